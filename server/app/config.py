@@ -4,6 +4,15 @@ class Settings(BaseSettings):
     # MongoDB Configuration
     MONGODB_URL: str = "mongodb://localhost:27017"
     DB_NAME: str = "wedding_app"
+    MONGODB_MAX_POOL_SIZE: int = 50
+    MONGODB_MIN_POOL_SIZE: int = 0
+    MONGODB_WAIT_QUEUE_TIMEOUT_MS: int = 2000
+    MONGODB_SERVER_SELECTION_TIMEOUT_MS: int = 5000
+    MONGODB_READ_PREFERENCE: str = "primary"
+    MONGODB_ANALYTICS_READ_PREFERENCE: str = "secondaryPreferred"
+    QUERY_TIMEOUT_MS: int = 2000  # maxTimeMS for user-facing reads
+    ANALYTICS_QUERY_TIMEOUT_MS: int = 15000  # maxTimeMS for admin/analytics reads
+    SLOW_QUERY_MS: int = 200
     
     # Supabase Configuration (for storage)
     SUPABASE_URL: str = "https://your-project.supabase.co"
@@ -27,6 +36,56 @@ class Settings(BaseSettings):
     # JWT Configuration
     JWT_SECRET_KEY: str = "your-secret-key-change-in-production"
 
+    # Resumable upload Configuration
+    UPLOAD_STAGING_DIR: str = "upload_staging"
+    UPLOAD_MAX_SIZE: int = 2 * 1024 * 1024 * 1024  # 2 GB
+    UPLOAD_SESSION_TTL_HOURS: int = 24
+    UPLOAD_LOCK_SECONDS: int = 60  # lease held by the request appending to an upload
+
+    # Upload admission control (per worker)
+    UPLOAD_MAX_CONCURRENT: int = 8
+    UPLOAD_MAX_INFLIGHT_BYTES: int = 256 * 1024 * 1024  # 256 MB
+    UPLOAD_USER_RATE: float = 1.0  # uploads per second
+    UPLOAD_USER_BURST: int = 20
+    UPLOAD_ALBUM_RATE: float = 10.0
+    UPLOAD_ALBUM_BURST: int = 200
+    UPLOAD_RETRY_AFTER_SECONDS: int = 2
+
+    # Album sweeper / storage GC Configuration
+    SWEEPER_ENABLED: bool = True
+    SWEEPER_INTERVAL_SECONDS: int = 600
+    SWEEPER_BATCH_SIZE: int = 100
+    SWEEPER_BATCH_DELAY_SECONDS: float = 1.0
+    SWEEPER_LEASE_SECONDS: int = 300
+    ORPHAN_GC_INTERVAL_SECONDS: int = 24 * 60 * 60
+    ORPHAN_GC_MIN_AGE_SECONDS: int = 60 * 60
+
+    # Delta sync Configuration
+    SYNC_SETTLE_MS: int = 2000  # changes are served once they are this old
+    SYNC_TOMBSTONE_RETENTION_DAYS: int = 30
+
+    # Moderation queue Configuration
+    MODERATION_LEASE_SECONDS: int = 300
+    MODERATION_MAX_CLAIM: int = 50
+    MODERATION_DEFAULT_SCORE: float = 0.5  # queue priority of media the NSFW API did not score
+
+    # Upload-time image metadata (dimensions, EXIF, BlurHash)
+    IMAGE_METADATA_WORKERS: int = 2
+
+    # Signed media URLs (CDN offload)
+    SIGNED_URLS_ENABLED: bool = True
+    MEDIA_URL_SIGNING_KEY: str = ""  # falls back to JWT_SECRET_KEY
+    CDN_BASE_URL: str = ""  # e.g. https://cdn.example.com or this API's public URL; signing is off until set
+    # With signing on, make the Supabase bucket / S3 bucket private: /media/cdn
+    # reads objects with the service credentials, not their public URLs
+    SIGNED_URL_TTL_SECONDS: int = 7 * 24 * 60 * 60  # private albums
+    SIGNED_URL_REVIEW_TTL_SECONDS: int = 15 * 60  # flagged media shown to moderators, never cached
+    SIGNED_URL_BUCKET_SECONDS: int = 24 * 60 * 60
+
+    # Search Configuration (in-memory prefix index on top of the Mongo text index)
+    SEARCH_IN_MEMORY: bool = False
+    SEARCH_REFRESH_SECONDS: float = 2.0
+
     class Config:
         env_file = ".env"
 
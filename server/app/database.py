@@ -1,6 +1,159 @@
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import monitoring
+from pymongo.read_preferences import read_pref_mode_from_name, make_read_preference
+from typing import Any, Dict, List, Optional
 from .config import settings
 
+class SlowQueryListener(monitoring.CommandListener):
+    """Log the shape and duration of commands slower than SLOW_QUERY_MS.
+
+    Only the structure of the command is logged; literal values are replaced
+    with ``"?"`` so logs never contain user data and similar queries group
+    together.
+    """
+
+    LOGGED_COMMANDS = {"find", "aggregate", "count", "distinct", "update", "delete", "findAndModify"}
+
+    def __init__(self, threshold_ms: int):
+        self.threshold_ms = threshold_ms
+        self._shapes: Dict[int, str] = {}
+
+    @staticmethod
+    def shape(value: Any) -> Any:
+        if isinstance(value, dict):
+            return {key: SlowQueryListener.shape(item) for key, item in value.items()}
+        if isinstance(value, (list, tuple)):
+            # Keep pipeline stages, collapse $in lists and the like
+            if value and all(isinstance(item, dict) for item in value):
+                return [SlowQueryListener.shape(item) for item in value]
+            return ["?"]
+        return "?"
+
+    def started(self, event):
+        if event.command_name not in self.LOGGED_COMMANDS:
+            return
+        command = event.command
+        shape = {
+            key: self.shape(command[key])
+            for key in ("filter", "query", "pipeline", "updates", "deletes", "sort", "projection")
+            if key in command
+        }
+        self._shapes[event.request_id] = f"{event.command_name} {command.get(event.command_name)} {shape}"
+
+    def succeeded(self, event):
+        self._finish(event)
+
+    def failed(self, event):
+        self._finish(event)
+
+    def _finish(self, event):
+        shape = self._shapes.pop(event.request_id, None)
+        duration_ms = event.duration_micros / 1000
+        if shape is not None and duration_ms >= self.threshold_ms:
+            print(f"Slow query ({duration_ms:.1f} ms): {shape}")
+
 # MongoDB connection
-client = AsyncIOMotorClient(settings.MONGODB_URL)
-db = client[settings.DB_NAME]
\ No newline at end of file
+client = AsyncIOMotorClient(
+    settings.MONGODB_URL,
+    maxPoolSize=settings.MONGODB_MAX_POOL_SIZE,
+    minPoolSize=settings.MONGODB_MIN_POOL_SIZE,
+    waitQueueTimeoutMS=settings.MONGODB_WAIT_QUEUE_TIMEOUT_MS,
+    serverSelectionTimeoutMS=settings.MONGODB_SERVER_SELECTION_TIMEOUT_MS,
+    event_listeners=[SlowQueryListener(settings.SLOW_QUERY_MS)]
+)
+db = client.get_database(
+    settings.DB_NAME,
+    read_preference=make_read_preference(read_pref_mode_from_name(settings.MONGODB_READ_PREFERENCE), None)
+)
+
+# Analytics/reporting reads go to secondaries where available so they do
+# not compete with uploads and user-facing reads on the primary.
+analytics_db = client.get_database(
+    settings.DB_NAME,
+    read_preference=make_read_preference(read_pref_mode_from_name(settings.MONGODB_ANALYTICS_READ_PREFERENCE), None)
+)
+
+async def ensure_indexes():
+    """Create the indexes the API relies on (no-op if they already exist)"""
+    await db["uploads"].create_index("updated_at")
+    await db["albums"].create_index("expires_at", sparse=True)
+    await db["albums"].create_index("deleted", sparse=True)
+    await db["media"].create_index([("album_id", 1), ("status", 1), ("uploaded_at", 1)])
+    await db["media"].create_index([("approved", 1), ("flagged", 1)])
+    await db["media"].create_index("uploaded_at")
+    await db["media"].create_index("storage_key")
+    await db["media"].create_index([("album_id", 1), ("change_seq", 1)])
+    # Covers sort=captured including its uploaded_at tiebreak; replaces the
+    # earlier (album_id, status, captured_at) index
+    await db["media"].create_index([("album_id", 1), ("status", 1), ("captured_at", 1), ("uploaded_at", 1)])
+    if "album_id_1_status_1_captured_at_1" in await db["media"].index_information():
+        await db["media"].drop_index("album_id_1_status_1_captured_at_1")
+    await db["media_tombstones"].create_index([("album_id", 1), ("change_seq", 1)])
+    await db["media"].create_index([("status", 1), ("moderation_score", -1), ("uploaded_at", 1)])
+    await db["media_tombstones"].create_index(
+        "changed_at", expireAfterSeconds=settings.SYNC_TOMBSTONE_RETENTION_DAYS * 24 * 60 * 60
+    )
+    await db["media"].create_index([("caption", "text")])
+    await db["albums"].create_index(
+        [("title", "text"), ("theme", "text")],
+        weights={"title": 3, "theme": 2}
+    )
+
+# Data access helpers used by the routers. Every read carries a maxTimeMS
+# budget so one slow query fails fast instead of holding a pooled connection.
+
+async def find_many(
+    collection: str,
+    query: Dict[str, Any],
+    projection: Optional[Dict[str, Any]] = None,
+    sort: Optional[List] = None,
+    limit: int = 100,
+    skip: int = 0,
+    max_time_ms: Optional[int] = None,
+    analytics: bool = False
+) -> List[Dict[str, Any]]:
+    database = analytics_db if analytics else db
+    timeout = max_time_ms or (settings.ANALYTICS_QUERY_TIMEOUT_MS if analytics else settings.QUERY_TIMEOUT_MS)
+    cursor = database[collection].find(query, projection, max_time_ms=timeout)
+    if sort:
+        cursor = cursor.sort(sort)
+    if skip:
+        cursor = cursor.skip(skip)
+    # Limit on the server too, so no extra batch is sent and the cursor closes
+    return await cursor.limit(limit).to_list(limit)
+
+async def find_one(
+    collection: str,
+    query: Dict[str, Any],
+    projection: Optional[Dict[str, Any]] = None,
+    max_time_ms: Optional[int] = None
+) -> Optional[Dict[str, Any]]:
+    return await db[collection].find_one(
+        query,
+        projection,
+        max_time_ms=max_time_ms or settings.QUERY_TIMEOUT_MS
+    )
+
+async def count(
+    collection: str,
+    query: Optional[Dict[str, Any]] = None,
+    max_time_ms: Optional[int] = None,
+    analytics: bool = False
+) -> int:
+    """Count matching documents; with no query, use the collection metadata"""
+    database = analytics_db if analytics else db
+    timeout = max_time_ms or (settings.ANALYTICS_QUERY_TIMEOUT_MS if analytics else settings.QUERY_TIMEOUT_MS)
+    if not query:
+        return await database[collection].estimated_document_count(maxTimeMS=timeout)
+    return await database[collection].count_documents(query, maxTimeMS=timeout)
+
+async def aggregate(
+    collection: str,
+    pipeline: List[Dict[str, Any]],
+    length: Optional[int] = None,
+    max_time_ms: Optional[int] = None,
+    analytics: bool = True
+) -> List[Dict[str, Any]]:
+    database = analytics_db if analytics else db
+    timeout = max_time_ms or (settings.ANALYTICS_QUERY_TIMEOUT_MS if analytics else settings.QUERY_TIMEOUT_MS)
+    return await database[collection].aggregate(pipeline, maxTimeMS=timeout).to_list(length)
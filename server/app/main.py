@@ -1,7 +1,14 @@
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
-from app.routers import users, media, album, payments, admin
+from app.routers import users, media, album, payments, admin, search, moderation
+from app.database import ensure_indexes
+from app.services.admission import AdmissionMiddleware
+from app.services.changes import change_log
+from app.services.moderation_queue import moderation_queue
+from app.services.search import search_service
+from app.services.signing import url_signer
+from app.services.sweeper import album_sweeper
 
 app = FastAPI(
     title="Wedding Memories API",
@@ -9,11 +16,16 @@ app = FastAPI(
     version="1.0.0"
 )
 
-# Mount static files only if directory exists (for Vercel compatibility)
+# Mount static files only if directory exists (for Vercel compatibility).
+# With signed URLs on, local media is only served through /media/cdn so the
+# signature (and a private album's expiry) cannot be bypassed.
 import os
-if os.path.exists("media_storage"):
+if os.path.exists("media_storage") and not url_signer.enabled:
     app.mount("/media_storage", StaticFiles(directory="media_storage"), name="media")
 
+# Upload admission control (added first so CORS headers wrap its rejections)
+app.add_middleware(AdmissionMiddleware)
+
 # CORS
 app.add_middleware(
     CORSMiddleware,
@@ -21,6 +33,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Location", "Upload-Offset", "Upload-Length", "Tus-Resumable", "Retry-After"],
 )
 
 # Include routers
@@ -29,6 +42,32 @@ app.include_router(media.router)
 app.include_router(album.router)
 app.include_router(payments.router)
 app.include_router(admin.router)
+app.include_router(search.router)
+app.include_router(moderation.router)
+
+@app.on_event("startup")
+async def startup():
+    try:
+        await ensure_indexes()
+    except Exception as e:
+        print(f"Index creation failed: {e}")
+    try:
+        await change_log.backfill()
+    except Exception as e:
+        print(f"Change sequence backfill failed: {e}")
+    try:
+        await moderation_queue.backfill_scores()
+    except Exception as e:
+        print(f"Moderation score backfill failed: {e}")
+    try:
+        await search_service.refresh(force=True)
+    except Exception as e:
+        print(f"Search index build failed: {e}")
+    album_sweeper.start()
+
+@app.on_event("shutdown")
+async def shutdown():
+    await album_sweeper.stop()
 
 @app.get("/")
 def root():
@@ -16,4 +16,25 @@ class Media(BaseModel):
 
     class Config:
         allow_population_by_field_name = True
-        arbitrary_types_allowed = True
\ No newline at end of file
+        arbitrary_types_allowed = True
+
+class MediaItem(BaseModel):
+    """Media document as returned by the listing endpoints"""
+    id: str = Field(alias="_id")
+    album_id: Optional[str] = None
+    uploaded_by: Optional[str] = None
+    filename: Optional[str] = None
+    type: Optional[str] = None
+    url: str
+    caption: Optional[str] = None
+    status: Optional[str] = None
+    approved: Optional[bool] = None
+    flagged: Optional[bool] = None
+    uploaded_at: Optional[datetime] = None
+    created_at: Optional[datetime] = None
+    width: Optional[int] = None
+    height: Optional[int] = None
+    orientation: Optional[int] = None
+    captured_at: Optional[datetime] = None
+    dominant_color: Optional[str] = None
+    blurhash: Optional[str] = None
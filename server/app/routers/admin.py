@@ -1,8 +1,12 @@
 from fastapi import APIRouter, HTTPException, Depends
-from app.database import db
+from app.database import find_many, count, aggregate
+from app.services.moderation_queue import moderation_queue
+from app.services.signing import url_signer
 from app.models.user import User
+from app.routers import users
 from typing import List, Dict, Any
 from datetime import datetime, timedelta
+from bson import ObjectId
 
 router = APIRouter(prefix="/admin", tags=["Admin"])
 
@@ -11,22 +15,22 @@ async def get_dashboard_stats():
     """Get dashboard statistics for admin panel"""
     try:
         # Get total users
-        total_users = await db["users"].count_documents({})
+        total_users = await count("users", analytics=True)
         
         # Get total albums
-        total_albums = await db["albums"].count_documents({})
+        total_albums = await count("albums", analytics=True)
         
         # Get total media
-        total_media = await db["media"].count_documents({})
+        total_media = await count("media", analytics=True)
         
         # Get flagged media count
-        flagged_media = await db["media"].count_documents({"status": "flagged"})
+        flagged_media = await count("media", {"status": "flagged"}, analytics=True)
         
         # Get recent uploads (last 7 days)
         week_ago = datetime.utcnow() - timedelta(days=7)
-        recent_uploads = await db["media"].count_documents({
+        recent_uploads = await count("media", {
             "uploaded_at": {"$gte": week_ago}
-        })
+        }, analytics=True)
         
         return {
             "total_users": total_users,
@@ -42,27 +46,17 @@ async def get_dashboard_stats():
 
 @router.get("/users")
 async def get_all_users():
-    """Get all users for admin panel"""
-    try:
-        users = await db["users"].find({}).to_list(1000)
-        return [
-            {
-                "id": str(user["_id"]),
-                "name": user.get("name", ""),
-                "email": user.get("email", ""),
-                "role": user.get("role", "guest"),
-                "created_at": user.get("created_at", datetime.utcnow())
-            }
-            for user in users
-        ]
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to get users: {str(e)}")
+    """Get all users for admin panel (same listing as GET /users/)"""
+    return await users.get_all_users()
 
-@router.get("/flagged-media")
+@router.get("/flagged-media", deprecated=True)
 async def get_flagged_media():
     """Get all flagged media for moderation"""
     try:
-        flagged_media = await db["media"].find({"status": "flagged"}).to_list(100)
+        flagged_media = await find_many("media", {"status": "flagged"}, {
+            "filename": 1, "url": 1, "caption": 1, "album_id": 1, "uploaded_at": 1, "type": 1, "status": 1
+        })
+        flagged_media = await url_signer.sign_media(flagged_media)
         return [
             {
                 "id": str(media["_id"]),
@@ -78,32 +72,33 @@ async def get_flagged_media():
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get flagged media: {str(e)}")
 
-@router.patch("/approve-media/{media_id}")
+@router.patch("/approve-media/{media_id}", deprecated=True)
 async def approve_media(media_id: str):
     """Approve flagged media"""
     try:
-        result = await db["media"].update_one(
-            {"_id": media_id},
-            {"$set": {"status": "active", "approved": True, "flagged": False}}
-        )
-        
-        if result.modified_count == 0:
+        if not await moderation_queue.approve_unleased(ObjectId(media_id)):
+            if await moderation_queue.is_leased(ObjectId(media_id)):
+                raise HTTPException(status_code=409, detail="Media is leased to a reviewer in the moderation queue")
             raise HTTPException(status_code=404, detail="Media not found")
         
         return {"message": "Media approved successfully"}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to approve media: {str(e)}")
 
-@router.delete("/reject-media/{media_id}")
+@router.delete("/reject-media/{media_id}", deprecated=True)
 async def reject_media(media_id: str):
     """Reject and delete flagged media"""
     try:
-        result = await db["media"].delete_one({"_id": media_id})
-        
-        if result.deleted_count == 0:
+        if not await moderation_queue.reject_unleased(ObjectId(media_id)):
+            if await moderation_queue.is_leased(ObjectId(media_id)):
+                raise HTTPException(status_code=409, detail="Media is leased to a reviewer in the moderation queue")
             raise HTTPException(status_code=404, detail="Media not found")
         
         return {"message": "Media rejected and deleted successfully"}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to reject media: {str(e)}")
 
@@ -123,7 +118,7 @@ async def get_analytics():
             {"$sort": {"_id": 1}}
         ]
         
-        daily_uploads = await db["media"].aggregate(pipeline).to_list(30)
+        daily_uploads = await aggregate("media", pipeline, 30)
         
         # Get media by type
         type_pipeline = [
@@ -133,13 +128,13 @@ async def get_analytics():
             }}
         ]
         
-        media_by_type = await db["media"].aggregate(type_pipeline).to_list(10)
+        media_by_type = await aggregate("media", type_pipeline, 10)
         
         return {
             "daily_uploads": daily_uploads,
             "media_by_type": media_by_type,
-            "total_albums": await db["albums"].count_documents({}),
-            "total_users": await db["users"].count_documents({})
+            "total_albums": await count("albums", analytics=True),
+            "total_users": await count("users", analytics=True)
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get analytics: {str(e)}") 
\ No newline at end of file
@@ -1,24 +1,49 @@
 from fastapi import APIRouter, HTTPException
-from app.database import db
+from app.database import db, find_many, find_one
 from app.models.album import Album
+from app.services.search import search_service
+from app.services.sweeper import album_sweeper
+from app.utils.serialization import FastJSONResponse
 from typing import List, Dict, Any
 from datetime import datetime
 from bson import ObjectId
 
 router = APIRouter(prefix="/albums", tags=["Albums"])
 
-@router.get("/")
+# Fields returned by the album endpoints
+ALBUM_PROJECTION = {
+    "host_id": 1, "title": 1, "theme": 1, "music_url": 1, "cover_photo": 1,
+    "is_public": 1, "expires_at": 1, "created_at": 1
+}
+
+def hidden_album_filter() -> Dict[str, Any]:
+    """Albums whose media must not be served: deleted or expired but not yet swept"""
+    return {"$or": [{"deleted": True}, {"expires_at": {"$lte": datetime.utcnow()}}]}
+
+async def is_album_hidden(album_id: str) -> bool:
+    if not ObjectId.is_valid(album_id):
+        return False
+    return await find_one("albums", {"_id": ObjectId(album_id), **hidden_album_filter()}, {"_id": 1}) is not None
+
+async def hidden_album_ids(include_private: bool = False) -> List[str]:
+    """Ids (as stored on media documents) of albums whose media must be left out of listings"""
+    query = hidden_album_filter()
+    if include_private:
+        query["$or"].append({"is_public": False})
+    albums = await find_many("albums", query, {"_id": 1}, limit=10_000)
+    return [str(album["_id"]) for album in albums]
+
+@router.get("/", response_class=FastJSONResponse, responses={200: {"model": List[Album]}})
 async def get_all_albums():
     """Get all albums"""
     try:
-        albums = await db["albums"].find({"is_public": True}).to_list(100)
-        return [
-            {
-                **album,
-                "_id": str(album["_id"])
-            }
-            for album in albums
-        ]
+        # Expired albums stay hidden until the sweeper removes them
+        albums = await find_many("albums", {
+            "is_public": True,
+            "deleted": {"$ne": True},
+            "$or": [{"expires_at": None}, {"expires_at": {"$gt": datetime.utcnow()}}]
+        }, ALBUM_PROJECTION)
+        return FastJSONResponse(albums)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get albums: {str(e)}")
 
@@ -26,7 +51,7 @@ async def get_all_albums():
 async def get_album(album_id: str):
     """Get specific album by ID"""
     try:
-        album = await db["albums"].find_one({"_id": ObjectId(album_id)})
+        album = await find_one("albums", {"_id": ObjectId(album_id), "deleted": {"$ne": True}}, ALBUM_PROJECTION)
         if not album:
             raise HTTPException(status_code=404, detail="Album not found")
         
@@ -49,6 +74,7 @@ async def create_album(album_data: Album):
         album_doc["created_at"] = datetime.utcnow()
         
         result = await db["albums"].insert_one(album_doc)
+        search_service.add_album(album_doc)
         
         album_doc["_id"] = str(result.inserted_id)
         return album_doc
@@ -60,13 +86,14 @@ async def update_album(album_id: str, album_data: Album):
     """Update an album"""
     try:
         result = await db["albums"].update_one(
-            {"_id": ObjectId(album_id)},
+            {"_id": ObjectId(album_id), "deleted": {"$ne": True}},
             {"$set": album_data.dict(by_alias=True, exclude_unset=True)}
         )
         
         if result.modified_count == 0:
             raise HTTPException(status_code=404, detail="Album not found")
         
+        search_service.add_album({"_id": ObjectId(album_id), **album_data.dict(exclude_unset=True)})
         return {"message": "Album updated successfully"}
     except HTTPException:
         raise
@@ -75,13 +102,18 @@ async def update_album(album_id: str, album_data: Album):
 
 @router.delete("/{album_id}")
 async def delete_album(album_id: str):
-    """Delete an album"""
+    """Delete an album; its media and stored files are removed in the background"""
     try:
-        result = await db["albums"].delete_one({"_id": ObjectId(album_id)})
+        result = await db["albums"].update_one(
+            {"_id": ObjectId(album_id), "deleted": {"$ne": True}},
+            {"$set": {"deleted": True, "deleted_at": datetime.utcnow()}}
+        )
         
-        if result.deleted_count == 0:
+        if result.matched_count == 0:
             raise HTTPException(status_code=404, detail="Album not found")
         
+        album_sweeper.wake()
+        
         return {"message": "Album deleted successfully"}
     except HTTPException:
         raise
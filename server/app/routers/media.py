@@ -1,124 +1,371 @@
-from fastapi import APIRouter, HTTPException, UploadFile, File, Form
-from app.database import db
-from app.models.media import Media
+from fastapi import APIRouter, HTTPException, UploadFile, File, Form, Header, Query, Request, Response
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
+from starlette.requests import ClientDisconnect
+from app.config import settings
+from app.database import db, find_many
+from app.models.media import Media, MediaItem
+from app.routers.album import hidden_album_ids, is_album_hidden
+from app.utils.serialization import FastJSONResponse
 from app.services.storage import storage_service
 from app.services.moderation import moderation_service
+from app.services.moderation_queue import moderation_queue
+from app.services.imaging import image_metadata_service
+from app.services.admission import admission_controller, retry_after_header
+from app.services.changes import change_log
+from app.services.search import search_service
+from app.services.signing import url_signer
+from app.services.uploads import LockLost, StagedFileMissing, upload_service
 from bson import ObjectId
 from datetime import datetime
+from typing import List
+import asyncio
+import mimetypes
+import os
 import uuid
 
 router = APIRouter(prefix="/media", tags=["Media"])
 
+# Fields returned by the media listing endpoints
+MEDIA_PROJECTION = {
+    "album_id": 1, "uploaded_by": 1, "filename": 1, "url": 1, "caption": 1, "type": 1,
+    "status": 1, "approved": 1, "flagged": 1, "uploaded_at": 1, "created_at": 1,
+    "width": 1, "height": 1, "orientation": 1, "captured_at": 1, "dominant_color": 1, "blurhash": 1
+}
+
+MEDIA_SORTS = {
+    "uploaded": [("uploaded_at", 1)],
+    # Media without a capture time (videos, stripped EXIF) sort first
+    "captured": [("captured_at", 1), ("uploaded_at", 1)],
+}
+
 @router.post("/")
 async def upload_media(media: Media):
-    result = await db["media"].insert_one(media.dict(by_alias=True))
+    media_doc = media.dict(by_alias=True)
+    media_doc.update(await change_log.next_seq(media.album_id))
+    result = await db["media"].insert_one(media_doc)
     return {"inserted_id": str(result.inserted_id)}
 
-@router.get("/album/{album_id}")
-async def get_album_media(album_id: str):
+@router.get("/album/{album_id}", response_class=FastJSONResponse, responses={200: {"model": List[MediaItem]}})
+async def get_album_media(album_id: str, sort: str = Query("uploaded", pattern="^(uploaded|captured)$")):
     try:
-        media = await db["media"].find({"album_id": album_id, "status": "active"}).to_list(100)
-        return [
-            {key: (str(value) if key == "_id" else value) for key, value in item.items()}
-            for item in media
-        ]
+        # Media of a deleted album stays hidden until the sweeper removes it
+        if await is_album_hidden(album_id):
+            raise HTTPException(status_code=404, detail="Album not found")
+        media = await find_many(
+            "media",
+            {"album_id": album_id, "status": "active"},
+            MEDIA_PROJECTION,
+            sort=MEDIA_SORTS[sort]
+        )
+        media = await url_signer.sign_media(media)
+        return FastJSONResponse(media)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get album media: {str(e)}")
 
+@router.get("/album/{album_id}/changes", response_class=FastJSONResponse)
+async def get_album_media_changes(
+    album_id: str,
+    since: str = Query(None),
+    limit: int = Query(500, ge=1, le=1000)
+):
+    """Media added, updated or removed in an album since a previous sync token.
+
+    Call without ``since`` for the initial sync, then pass back ``next_token``.
+    While ``has_more`` is true, call again straight away with the new token.
+    Media that is flagged after the client saw it is listed in ``deleted``.
+    If ``reset`` is true the token was too old: replace local state with
+    ``updated``.
+    """
+    if await is_album_hidden(album_id):
+        raise HTTPException(status_code=404, detail="Album not found")
+    try:
+        changes = await change_log.changes_since(album_id, since, MEDIA_PROJECTION, limit)
+        changes["updated"] = await url_signer.sign_media(changes["updated"])
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid sync token")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to get album changes: {str(e)}")
+
+    return FastJSONResponse(changes)
+
+@router.get("/cdn/{expires}/{signature}/{key}")
+async def get_signed_media(expires: int, signature: str, key: str):
+    """Serve a stored file behind a signed URL with long-lived cache headers"""
+    return _serve_signed_media(expires, signature, key)
+
+@router.get("/cdn/review/{expires}/{signature}/{key}")
+async def get_signed_review_media(expires: int, signature: str, key: str):
+    """Serve media awaiting review behind a short-lived signed URL that is never cached"""
+    return _serve_signed_media(expires, signature, key, review=True)
+
+def _serve_signed_media(expires: int, signature: str, key: str, review: bool = False):
+    if os.path.basename(key) != key or not url_signer.verify(key, expires, signature, review):
+        raise HTTPException(
+            status_code=403,
+            detail="Invalid or expired media URL",
+            headers={"Cache-Control": "no-store"}
+        )
+
+    headers = {"Cache-Control": url_signer.cache_control(expires, review)}
+    media_type = mimetypes.guess_type(key)[0] or "application/octet-stream"
+    if storage_service.storage_type == "local":
+        file_path = os.path.join("media_storage", key)
+        if not os.path.isfile(file_path):
+            raise HTTPException(status_code=404, detail="Media not found")
+        return FileResponse(file_path, media_type=media_type, headers=headers)
+    return StreamingResponse(storage_service.stream_file(key), media_type=media_type, headers=headers)
+
 @router.post("/report/{media_id}")
 async def report_media(media_id: str):
-    result = await db["media"].update_one(
-        {"_id": ObjectId(media_id)},
-        {"$set": {"status": "flagged"}}
-    )
-    if result.modified_count == 0:
+    if not await change_log.update_media(ObjectId(media_id), {"status": "flagged"}):
         raise HTTPException(status_code=404, detail="Media not found")
+    await moderation_queue.backfill_scores({"_id": ObjectId(media_id)})
     return {"message": "Media flagged for review"}
 
 # supabase-routing
 
-@router.post("/upload/")
-async def upload_media_file(
-    file: UploadFile = File(...),
-    caption: str = Form(None),
-    album_id: str = Form(None)
+async def _store_media(
+    original_filename: str,
+    content_type: str,
+    caption: str,
+    album_id: str,
+    contents: bytes = None,
+    staged_path: str = None
 ):
-    # Read file content
-    contents = await file.read()
-    
+    """Moderate, store and record an upload given either its bytes or a staged file"""
     # Generate unique filename
-    file_extension = file.filename.split('.')[-1] if '.' in file.filename else 'jpg'
+    file_extension = original_filename.split('.')[-1] if '.' in original_filename else 'jpg'
     unique_filename = f"{uuid.uuid4()}.{file_extension}"
     
     # Check if image is appropriate (moderation)
     is_appropriate = True
-    if file.content_type.startswith("image/"):
-        is_appropriate = await moderation_service.is_appropriate(contents)
+    # Videos and images the NSFW API did not score get the default priority
+    moderation_score = settings.MODERATION_DEFAULT_SCORE
+    image_metadata = {}
+    if content_type.startswith("image/"):
+        if contents is None:
+            with open(staged_path, "rb") as f:
+                contents = f.read()
+        assessment, image_metadata = await asyncio.gather(
+            moderation_service.assess(contents),
+            image_metadata_service.extract(contents)
+        )
+        is_appropriate = assessment["is_safe"]
+        if assessment["score"] is not None:
+            moderation_score = assessment["score"]
     
     # Upload to storage service
-    file_url = await storage_service.upload_file(
-        contents, 
-        unique_filename, 
-        file.content_type
-    )
+    if staged_path is not None:
+        file_url = await storage_service.upload_staged_file(
+            staged_path,
+            unique_filename,
+            content_type
+        )
+    else:
+        file_url = await storage_service.upload_file(
+            contents, 
+            unique_filename, 
+            content_type
+        )
 
     metadata = {
-        "filename": file.filename,
+        **await change_log.next_seq(album_id),
+        "filename": original_filename,
         "url": file_url,
+        "storage_key": unique_filename,
         "caption": caption,
         "album_id": album_id,
         "uploaded_at": datetime.utcnow(),
         "status": "active" if is_appropriate else "flagged",
         "flagged": not is_appropriate,
         "approved": is_appropriate,
-        "type": "photo" if file.content_type.startswith("image/") else "video"
+        "moderation_score": moderation_score,
+        "type": "photo" if content_type.startswith("image/") else "video",
+        **image_metadata
     }
 
     result = await db["media"].insert_one(metadata)
+    search_service.add_media(metadata)
+
+    # Never hand out the raw storage URL while signed URLs are on
+    signed, = await url_signer.sign_media([dict(metadata)])
 
     return {
-        "url": file_url,
+        "url": signed["url"],
         "inserted_id": str(result.inserted_id),
         "message": "Upload successful and metadata stored.",
         "moderated": not is_appropriate
     }
 
+@router.post("/upload/")
+async def upload_media_file(
+    file: UploadFile = File(...),
+    caption: str = Form(None),
+    album_id: str = Form(None)
+):
+    wait = admission_controller.check_album(album_id)
+    if wait:
+        raise HTTPException(status_code=429, detail="Album upload rate limit exceeded", headers=retry_after_header(wait))
+
+    # Read file content
+    contents = await file.read()
+    return await _store_media(file.filename, file.content_type, caption, album_id, contents=contents)
+
+# Resumable uploads (tus-style: create, HEAD for offset, PATCH chunks)
+
+TUS_HEADERS = {"Tus-Resumable": "1.0.0"}
+
+@router.post("/uploads/", status_code=201)
+async def create_upload(
+    upload_length: int = Header(...),
+    upload_metadata: str = Header(None)
+):
+    """Start a resumable upload; chunks are then sent with PATCH to Location"""
+    if upload_length <= 0 or upload_length > upload_service.max_size:
+        raise HTTPException(status_code=413, detail="Upload length exceeds maximum size")
+
+    metadata = upload_service.parse_metadata(upload_metadata)
+    wait = admission_controller.check_album(metadata.get("album_id"))
+    if wait:
+        raise HTTPException(status_code=429, detail="Album upload rate limit exceeded", headers=retry_after_header(wait))
+
+    session = await upload_service.create_session(upload_length, metadata)
+    return Response(
+        status_code=201,
+        headers={**TUS_HEADERS, "Location": f"/media/uploads/{session['_id']}", "Upload-Offset": "0"}
+    )
+
+@router.head("/uploads/{upload_id}")
+async def get_upload_offset(upload_id: str):
+    """Report how many bytes of an upload have been received"""
+    session = await upload_service.get_session(upload_id)
+    if not session:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    try:
+        offset = upload_service.get_offset(session)
+    except StagedFileMissing as e:
+        raise HTTPException(status_code=410, detail=str(e), headers=TUS_HEADERS)
+
+    return Response(headers={
+        **TUS_HEADERS,
+        "Upload-Offset": str(offset),
+        "Upload-Length": str(session["length"]),
+        "Cache-Control": "no-store"
+    })
+
+@router.patch("/uploads/{upload_id}")
+async def upload_chunk(
+    upload_id: str,
+    request: Request,
+    upload_offset: int = Header(...),
+    content_type: str = Header(None)
+):
+    """Append a chunk at the given offset; the last chunk finalizes the upload"""
+    if content_type != "application/offset+octet-stream":
+        raise HTTPException(status_code=415, detail="Content-Type must be application/offset+octet-stream")
+
+    session = await upload_service.get_session(upload_id)
+    if not session:
+        raise HTTPException(status_code=404, detail="Upload not found")
+
+    # Held from the offset check until the body is written (and finalized)
+    token = await upload_service.acquire_lock(upload_id)
+    if token is None:
+        raise HTTPException(
+            status_code=423,
+            detail="Upload is locked by another request",
+            headers={**TUS_HEADERS, **retry_after_header(settings.UPLOAD_RETRY_AFTER_SECONDS)}
+        )
+
+    try:
+        # Re-read under the lock: the previous holder may have advanced the offset
+        session = await upload_service.get_session(upload_id)
+        try:
+            current_offset = upload_service.get_offset(session)
+        except StagedFileMissing as e:
+            raise HTTPException(status_code=410, detail=str(e), headers=TUS_HEADERS)
+        if upload_offset != current_offset:
+            raise HTTPException(
+                status_code=409,
+                detail="Upload-Offset does not match current offset",
+                headers={**TUS_HEADERS, "Upload-Offset": str(current_offset)}
+            )
+
+        try:
+            offset = await upload_service.append_chunk(session, request.stream(), token)
+        except ClientDisconnect:
+            # Bytes received so far are kept; the client resumes after a HEAD
+            return Response(status_code=204, headers=TUS_HEADERS)
+        except LockLost as e:
+            raise HTTPException(status_code=423, detail=str(e), headers=TUS_HEADERS)
+        except ValueError as e:
+            raise HTTPException(status_code=413, detail=str(e))
+
+        headers = {**TUS_HEADERS, "Upload-Offset": str(offset)}
+        if offset < session["length"]:
+            return Response(status_code=204, headers=headers)
+
+        result = await _store_media(
+            session["filename"],
+            session["content_type"],
+            session["caption"],
+            session["album_id"],
+            staged_path=upload_service.staged_path(upload_id)
+        )
+        await upload_service.delete_session(upload_id)
+        return JSONResponse(result, headers=headers)
+    finally:
+        await upload_service.release_lock(upload_id, token)
+
+@router.delete("/uploads/{upload_id}", status_code=204)
+async def cancel_upload(upload_id: str):
+    """Abandon a resumable upload and discard its staged bytes"""
+    session = await upload_service.get_session(upload_id)
+    if not session:
+        raise HTTPException(status_code=404, detail="Upload not found")
+
+    await upload_service.delete_session(upload_id)
+    return Response(status_code=204, headers=TUS_HEADERS)
+
 
 # all-end-point
 # all-end-point
-@router.get("/all")
+@router.get("/all", response_class=FastJSONResponse, responses={200: {"model": List[MediaItem]}})
 async def get_all_media():
-    media = await db["media"].find({"approved": True, "flagged": False}).to_list(100)
-    return [
-        {key: (str(value) if key == "_id" else value) for key, value in item.items()}
-        for item in media
-    ]
+    media = await find_many("media", {
+        "approved": True,
+        "flagged": False,
+        "album_id": {"$nin": await hidden_album_ids()}
+    }, MEDIA_PROJECTION)
+    media = await url_signer.sign_media(media)
+    return FastJSONResponse(media)
 # Host moderation routes
 
+async def _raise_unresolvable(media_id: ObjectId):
+    """Explain why a deprecated approve/reject could not act on an item"""
+    if await moderation_queue.is_leased(media_id):
+        raise HTTPException(status_code=409, detail="Media is leased to a reviewer in the moderation queue")
+    raise HTTPException(status_code=404, detail="Media not found")
+
 # Retrieve flagged media for review
-@router.get("/flagged")
+@router.get("/flagged", deprecated=True, response_class=FastJSONResponse, responses={200: {"model": List[MediaItem]}})
 async def get_flagged_media():
-    flagged_media = await db["media"].find({"status": "flagged"}).to_list(100)
-    return [
-        {key: (str(value) if key == "_id" else value) for key, value in item.items()}
-        for item in flagged_media
-    ]
+    flagged_media = await find_many("media", {"status": "flagged"}, MEDIA_PROJECTION)
+    flagged_media = await url_signer.sign_media(flagged_media)
+    return FastJSONResponse(flagged_media)
 
 # Approve a flagged media item
-@router.patch("/approve/{media_id}")
+@router.patch("/approve/{media_id}", deprecated=True)
 async def approve_media(media_id: str):
-    result = await db["media"].update_one(
-        {"_id": ObjectId(media_id)},
-        {"$set": {"status": "active", "approved": True, "flagged": False}}
-    )
-    if result.modified_count == 0:
-        raise HTTPException(status_code=404, detail="Media not found")
+    if not await moderation_queue.approve_unleased(ObjectId(media_id)):
+        await _raise_unresolvable(ObjectId(media_id))
     return {"message": "Media approved and made public"}
 
 # Reject/delete a flagged media item
-@router.delete("/reject/{media_id}")
+@router.delete("/reject/{media_id}", deprecated=True)
 async def reject_media(media_id: str):
-    result = await db["media"].delete_one({"_id": ObjectId(media_id)})
-    if result.deleted_count == 0:
-        raise HTTPException(status_code=404, detail="Media not found")
+    if not await moderation_queue.reject_unleased(ObjectId(media_id)):
+        await _raise_unresolvable(ObjectId(media_id))
     return {"message": "Media permanently deleted"}
\ No newline at end of file
@@ -0,0 +1,54 @@
+from fastapi import APIRouter, HTTPException, Query
+from app.services.moderation_queue import moderation_queue
+from app.services.signing import url_signer
+from app.utils.serialization import FastJSONResponse
+from bson import ObjectId
+
+router = APIRouter(prefix="/moderation", tags=["Moderation"])
+
+# Fields a reviewer needs to make a decision
+QUEUE_PROJECTION = {
+    "filename": 1, "url": 1, "caption": 1, "album_id": 1, "uploaded_at": 1, "type": 1, "status": 1
+}
+
+@router.post("/claim", response_class=FastJSONResponse)
+async def claim_flagged_media(
+    reviewer: str = Query(..., min_length=1),
+    limit: int = Query(10, ge=1, le=50)
+):
+    """Lease the next batch of flagged media to a reviewer (highest score, oldest first)"""
+    try:
+        items = await moderation_queue.claim(reviewer, limit, QUEUE_PROJECTION)
+        items = await url_signer.sign_media(items)
+        return FastJSONResponse(items)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to claim flagged media: {str(e)}")
+
+@router.get("/stats")
+async def get_queue_stats():
+    """Number of flagged items waiting and currently leased"""
+    try:
+        return await moderation_queue.stats()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to get queue stats: {str(e)}")
+
+@router.post("/{media_id}/approve")
+async def approve_claimed_media(media_id: str, reviewer: str = Query(..., min_length=1)):
+    """Approve a leased item"""
+    if not await moderation_queue.approve(ObjectId(media_id), reviewer):
+        raise HTTPException(status_code=409, detail="Media is not leased to this reviewer")
+    return {"message": "Media approved and made public"}
+
+@router.post("/{media_id}/reject")
+async def reject_claimed_media(media_id: str, reviewer: str = Query(..., min_length=1)):
+    """Reject and delete a leased item"""
+    if not await moderation_queue.reject(ObjectId(media_id), reviewer):
+        raise HTTPException(status_code=409, detail="Media is not leased to this reviewer")
+    return {"message": "Media permanently deleted"}
+
+@router.post("/{media_id}/release")
+async def release_claimed_media(media_id: str, reviewer: str = Query(..., min_length=1)):
+    """Return a leased item to the queue without deciding"""
+    if not await moderation_queue.release(ObjectId(media_id), reviewer):
+        raise HTTPException(status_code=409, detail="Media is not leased to this reviewer")
+    return {"message": "Media returned to the queue"}
@@ -0,0 +1,49 @@
+from fastapi import APIRouter, HTTPException, Query
+from app.routers.album import ALBUM_PROJECTION, hidden_album_ids
+from app.routers.media import MEDIA_PROJECTION
+from app.services.search import search_service
+from app.services.signing import url_signer
+from app.utils.serialization import FastJSONResponse
+from datetime import datetime
+
+router = APIRouter(prefix="/search", tags=["Search"])
+
+@router.get("/", response_class=FastJSONResponse)
+async def search(
+    q: str = Query(..., min_length=1, max_length=200),
+    scope: str = Query("all", pattern="^(all|albums|media)$"),
+    page: int = Query(1, ge=1),
+    limit: int = Query(20, ge=1, le=100)
+):
+    """Search album titles/themes and media captions, ranked by relevance.
+
+    Media is only returned from public, live albums, the same albums the
+    album results are drawn from.
+
+    With ``SEARCH_IN_MEMORY`` enabled, only the newest ``MAX_DRIVER_SCAN``
+    (20,000) documents containing the query's rarest term are ranked. For
+    queries made entirely of very common words, older matches and pages
+    beyond those documents are not returned.
+    """
+    try:
+        results = {"query": q, "page": page, "limit": limit}
+
+        if scope in ("all", "albums"):
+            albums = await search_service.search(q, "albums", {
+                "is_public": True,
+                "deleted": {"$ne": True},
+                "$or": [{"expires_at": None}, {"expires_at": {"$gt": datetime.utcnow()}}]
+            }, ALBUM_PROJECTION, page, limit)
+            results["albums"] = albums
+
+        if scope in ("all", "media"):
+            media = await search_service.search(q, "media", {
+                "approved": True,
+                "flagged": False,
+                "album_id": {"$nin": await hidden_album_ids(include_private=True)}
+            }, MEDIA_PROJECTION, page, limit)
+            results["media"] = await url_signer.sign_media(media)
+
+        return FastJSONResponse(results)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Search failed: {str(e)}")
@@ -1,10 +1,11 @@
 from fastapi import APIRouter, HTTPException, Depends
-from app.database import db
+from app.database import db, find_many, find_one
 from app.models.user import User
 from typing import List, Dict, Any
 from datetime import datetime
 import jwt
 from app.config import settings
+from app.utils.serialization import FastJSONResponse
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
@@ -12,6 +13,15 @@ router = APIRouter(prefix="/users", tags=["Users"])
 JWT_SECRET = settings.JWT_SECRET_KEY or "your-secret-key"
 JWT_ALGORITHM = "HS256"
 
+def _user_summary(user: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "id": str(user["_id"]),
+        "name": user.get("name", ""),
+        "email": user.get("email", ""),
+        "role": user.get("role", "guest"),
+        "created_at": user.get("created_at", datetime.utcnow())
+    }
+
 def create_token(user_id: str) -> str:
     """Create JWT token"""
     payload = {
@@ -25,7 +35,7 @@ async def register_user(user_data: User):
     """Register a new user"""
     try:
         # Check if user already exists
-        existing_user = await db["users"].find_one({"email": user_data.email})
+        existing_user = await find_one("users", {"email": user_data.email}, {"_id": 1})
         print("exisitng user", existing_user)
         if existing_user:
             raise HTTPException(status_code=400, detail="User already exists")
@@ -63,7 +73,7 @@ async def login_user(credentials: Dict[str, str]):
             raise HTTPException(status_code=400, detail="Email and password required")
         
         # Find user (in real app, hash password)
-        user = await db["users"].find_one({"email": email})
+        user = await find_one("users", {"email": email})
         if not user:
             raise HTTPException(status_code=401, detail="Invalid credentials")
         
@@ -99,20 +109,13 @@ async def get_user_profile():
     # In real app, get user from token
     return {"message": "Profile endpoint - implement with JWT middleware"}
 
-@router.get("/")
+@router.get("/", response_class=FastJSONResponse)
 async def get_all_users():
     """Get all users (admin only)"""
     try:
-        users = await db["users"].find({}).to_list(1000)
-        return [
-            {
-                "id": str(user["_id"]),
-                "name": user.get("name", ""),
-                "email": user.get("email", ""),
-                "role": user.get("role", "guest"),
-                "created_at": user.get("created_at", datetime.utcnow())
-            }
-            for user in users
-        ]
+        users = await find_many(
+            "users", {}, {"name": 1, "email": 1, "role": 1, "created_at": 1}, limit=1000
+        )
+        return FastJSONResponse([_user_summary(user) for user in users])
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get users: {str(e)}")
\ No newline at end of file
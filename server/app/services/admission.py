@@ -0,0 +1,173 @@
+from app.config import settings
+from fastapi.responses import JSONResponse
+from typing import Dict, Optional, Tuple
+import jwt
+import math
+import re
+import time
+
+# Upload routes guarded before their bodies are read
+UPLOAD_PATH = re.compile(r"^/media/upload/?$")
+RESUMABLE_CREATE_PATH = re.compile(r"^/media/uploads/?$")
+RESUMABLE_CHUNK_PATH = re.compile(r"^/media/uploads/[^/]+$")
+
+class TokenBucket:
+    """Per-key token buckets refilled continuously at ``rate`` tokens/second"""
+
+    MAX_KEYS = 10000
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+
+    def take(self, key: str) -> float:
+        """Take one token for ``key``; returns 0 if admitted, else seconds to wait"""
+        now = time.monotonic()
+        tokens, updated = self._buckets.get(key, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - updated) * self.rate)
+
+        if tokens < 1:
+            self._buckets[key] = (tokens, now)
+            return (1 - tokens) / self.rate if self.rate > 0 else float(settings.UPLOAD_RETRY_AFTER_SECONDS)
+
+        self._buckets[key] = (tokens - 1, now)
+        if len(self._buckets) > self.MAX_KEYS:
+            self._prune(now)
+        return 0.0
+
+    def _prune(self, now: float):
+        # Buckets that have refilled completely behave like new ones; drop them
+        for key, (tokens, updated) in list(self._buckets.items()):
+            if tokens + (now - updated) * self.rate >= self.burst:
+                del self._buckets[key]
+
+class AdmissionController:
+    """Per-worker admission control for uploads.
+
+    Limits how many uploads run at once and how many buffered request-body
+    bytes are in flight, and rate-limits uploads per user and per album.
+    Resumable chunks are streamed to disk, so they take a slot but no bytes. Anything over
+    a limit is rejected straight away with ``Retry-After`` so load is shed
+    before it reaches moderation, storage or MongoDB.
+    """
+
+    def __init__(self):
+        self.max_concurrent = settings.UPLOAD_MAX_CONCURRENT
+        self.max_inflight_bytes = settings.UPLOAD_MAX_INFLIGHT_BYTES
+        self.user_buckets = TokenBucket(settings.UPLOAD_USER_RATE, settings.UPLOAD_USER_BURST)
+        self.album_buckets = TokenBucket(settings.UPLOAD_ALBUM_RATE, settings.UPLOAD_ALBUM_BURST)
+        self.active = 0
+        self.inflight_bytes = 0
+
+    def acquire(self, size: int) -> Optional[str]:
+        """Reserve a slot and ``size`` bytes; returns a reason if rejected"""
+        if self.active >= self.max_concurrent:
+            return "Too many uploads in progress"
+        if self.inflight_bytes + size > self.max_inflight_bytes:
+            return "Upload byte budget exhausted"
+        self.active += 1
+        self.inflight_bytes += size
+        return None
+
+    def release(self, size: int):
+        self.active -= 1
+        self.inflight_bytes -= size
+
+    def check_user(self, user_key: str) -> float:
+        return self.user_buckets.take(user_key)
+
+    def check_album(self, album_id: Optional[str]) -> float:
+        """Rate-limit uploads into one album; returns seconds to wait (0 if admitted)"""
+        if not album_id:
+            return 0.0
+        return self.album_buckets.take(album_id)
+
+admission_controller = AdmissionController()
+
+def retry_after_header(seconds: float) -> Dict[str, str]:
+    return {"Retry-After": str(max(1, math.ceil(seconds)))}
+
+def _user_key(scope) -> str:
+    """Identify the uploader by JWT user id, falling back to client address"""
+    headers = dict(scope.get("headers") or [])
+    authorization = headers.get(b"authorization", b"").decode("latin-1")
+    if authorization.startswith("Bearer "):
+        try:
+            payload = jwt.decode(
+                authorization[7:],
+                settings.JWT_SECRET_KEY or "your-secret-key",
+                algorithms=["HS256"]
+            )
+            if payload.get("user_id"):
+                return f"user:{payload['user_id']}"
+        except jwt.PyJWTError:
+            pass
+    client = scope.get("client")
+    return f"ip:{client[0] if client else 'unknown'}"
+
+class AdmissionMiddleware:
+    """ASGI middleware applying :data:`admission_controller` to upload routes.
+
+    Runs before FastAPI reads the request body, so a rejected upload costs
+    almost nothing. Per-album limits are applied in the routes, since the
+    album id is only known once the form or upload metadata is parsed.
+    """
+
+    def __init__(self, app, controller: AdmissionController = admission_controller):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method, path = scope["method"], scope["path"]
+        is_upload = method == "POST" and UPLOAD_PATH.match(path)
+        is_create = method == "POST" and RESUMABLE_CREATE_PATH.match(path)
+        is_chunk = method == "PATCH" and RESUMABLE_CHUNK_PATH.match(path)
+        if not (is_upload or is_create or is_chunk):
+            await self.app(scope, receive, send)
+            return
+
+        # One token per file: plain uploads and resumable creates, not chunks
+        if is_upload or is_create:
+            wait = self.controller.check_user(_user_key(scope))
+            if wait:
+                await self._reject(scope, receive, send, 429, "Upload rate limit exceeded", wait)
+                return
+        if is_create:
+            await self.app(scope, receive, send)
+            return
+
+        if is_chunk:
+            # Streamed to the staging file, never held in memory
+            size = 0
+        else:
+            # Plain uploads are read into memory whole, so their size must be
+            # known (and bounded) before the body is accepted. The server
+            # enforces Content-Length framing, so the body cannot exceed it.
+            headers = dict(scope.get("headers") or [])
+            try:
+                size = int(headers[b"content-length"])
+            except (KeyError, ValueError):
+                await self._reject(scope, receive, send, 411, "Content-Length required; use resumable uploads", None)
+                return
+            if size > self.controller.max_inflight_bytes:
+                await self._reject(scope, receive, send, 413, "Request too large; use resumable uploads", None)
+                return
+
+        reason = self.controller.acquire(size)
+        if reason:
+            await self._reject(scope, receive, send, 503, reason, settings.UPLOAD_RETRY_AFTER_SECONDS)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release(size)
+
+    async def _reject(self, scope, receive, send, status_code: int, detail: str, retry_after: Optional[float]):
+        headers = retry_after_header(retry_after) if retry_after else None
+        response = JSONResponse({"detail": detail}, status_code=status_code, headers=headers)
+        await response(scope, receive, send)
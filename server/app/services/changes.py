@@ -0,0 +1,183 @@
+from app.config import settings
+from app.database import db, find_many
+from datetime import datetime, timedelta
+from pymongo import ReturnDocument, UpdateOne
+from typing import Any, Dict, List, Optional, Tuple
+import base64
+
+class ChangeLog:
+    """Monotonic per-album change sequence for media, used for delta sync.
+
+    Every write to a media document stamps it with the album's next
+    ``change_seq`` and a ``changed_at`` time; deletions leave a tombstone in
+    ``media_tombstones``. Clients pass back an opaque token holding the last
+    sequence they saw and get only what changed after it.
+
+    Only active media is served as ``updated``, matching the album listing.
+    Media that has been flagged (by moderation or a report) is sent as a
+    deletion, and comes back as an update if it is approved again.
+
+    Sequences are allocated just before the write lands, so a change is only
+    served once it is ``SYNC_SETTLE_MS`` old. That keeps a slow write with a
+    lower sequence from being skipped by a client that already saw a faster
+    write with a higher one.
+    """
+
+    def __init__(self):
+        self.settle = timedelta(milliseconds=settings.SYNC_SETTLE_MS)
+        self.tombstone_retention = timedelta(days=settings.SYNC_TOMBSTONE_RETENTION_DAYS)
+
+    async def next_seq(self, album_id: Optional[str]) -> Dict[str, Any]:
+        """Allocate the album's next sequence; returns fields to ``$set`` on the media document"""
+        counter = await db["album_sequences"].find_one_and_update(
+            {"_id": str(album_id)},
+            {"$inc": {"seq": 1}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        return {"change_seq": counter["seq"], "changed_at": datetime.utcnow()}
+
+    async def record_deletion(self, media: Dict[str, Any]):
+        """Leave a tombstone so syncing clients learn the media was removed"""
+        change = await self.next_seq(media.get("album_id"))
+        await db["media_tombstones"].insert_one({
+            "media_id": str(media["_id"]),
+            "album_id": media.get("album_id"),
+            **change
+        })
+
+    async def update_media(self, media_id: Any, fields: Dict[str, Any], conditions: Optional[Dict[str, Any]] = None) -> bool:
+        """``$set`` fields on a media document and bump its change sequence.
+
+        Returns False if the document does not exist or does not match the
+        extra ``conditions``.
+        """
+        query = {"_id": media_id, **(conditions or {})}
+        media = await db["media"].find_one(query, {"album_id": 1})
+        if not media:
+            return False
+        change = await self.next_seq(media.get("album_id"))
+        result = await db["media"].update_one(query, {"$set": {**fields, **change}})
+        return result.matched_count > 0
+
+    async def delete_media(self, media_id: Any, conditions: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """Delete a media document and leave a tombstone; returns the deleted document"""
+        media = await db["media"].find_one_and_delete({"_id": media_id, **(conditions or {})})
+        if media:
+            await self.record_deletion(media)
+        return media
+
+    def encode_token(self, seq: int) -> str:
+        raw = f"{seq}.{int(datetime.utcnow().timestamp())}"
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+    def decode_token(self, token: Optional[str]) -> Tuple[int, Optional[datetime]]:
+        """Return (sequence, issue time); raises ValueError for a malformed token"""
+        if not token:
+            return 0, None
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)).decode()
+        seq, issued = raw.split(".")
+        try:
+            return int(seq), datetime.utcfromtimestamp(int(issued))
+        except (OverflowError, OSError):
+            raise ValueError("Sync token timestamp out of range")
+
+    async def backfill(self, batch_size: int = 1000) -> int:
+        """Give media written before delta sync existed a sequence number.
+
+        Run once at startup rather than on the sync request path. Each batch
+        reserves a block of sequence numbers per album with one ``$inc`` and
+        stamps the documents with one bulk write.
+        """
+        backfilled = 0
+        while True:
+            legacy = await find_many(
+                "media", {"change_seq": {"$exists": False}}, {"_id": 1, "album_id": 1}, limit=batch_size
+            )
+            if not legacy:
+                return backfilled
+
+            by_album: Dict[Optional[str], List[Any]] = {}
+            for item in legacy:
+                by_album.setdefault(item.get("album_id"), []).append(item["_id"])
+
+            # Backfilled changes are visible straight away
+            changed_at = datetime.utcnow() - self.settle
+            operations = []
+            for album_id, media_ids in by_album.items():
+                counter = await db["album_sequences"].find_one_and_update(
+                    {"_id": str(album_id)},
+                    {"$inc": {"seq": len(media_ids)}},
+                    upsert=True,
+                    return_document=ReturnDocument.AFTER
+                )
+                first = counter["seq"] - len(media_ids) + 1
+                operations += [
+                    UpdateOne(
+                        {"_id": media_id, "change_seq": {"$exists": False}},
+                        {"$set": {"change_seq": first + i, "changed_at": changed_at}}
+                    )
+                    for i, media_id in enumerate(media_ids)
+                ]
+            await db["media"].bulk_write(operations, ordered=False)
+            backfilled += len(operations)
+
+    async def changes_since(
+        self,
+        album_id: str,
+        token: Optional[str],
+        projection: Dict[str, Any],
+        limit: int
+    ) -> Dict[str, Any]:
+        """Media changed and media deleted in an album after ``token``, oldest first"""
+        since, issued = self.decode_token(token)
+        if issued is not None and datetime.utcnow() - issued > self.tombstone_retention:
+            # Tombstones older than the token may be gone; start over
+            since, issued = 0, None
+            reset = True
+        else:
+            reset = False
+
+        cutoff = datetime.utcnow() - self.settle
+        query = {
+            "album_id": album_id,
+            "change_seq": {"$gt": since},
+            "changed_at": {"$lte": cutoff}
+        }
+        # A first sync starts from the current state, so hidden media is left out
+        media_query = query if since else {**query, "status": "active"}
+        updated = await find_many(
+            "media", media_query, {**projection, "change_seq": 1, "status": 1},
+            sort=[("change_seq", 1)], limit=limit + 1
+        )
+
+        # A first sync starts from the current state, so no tombstones needed
+        deleted: List[Dict[str, Any]] = []
+        if since:
+            deleted = await find_many(
+                "media_tombstones", query, {"media_id": 1, "change_seq": 1},
+                sort=[("change_seq", 1)], limit=limit + 1
+            )
+
+        # Media that is no longer active is gone as far as the client is concerned
+        merged = sorted(
+            [("updated" if item.get("status") == "active" else "hidden", item) for item in updated]
+            + [("deleted", item) for item in deleted],
+            key=lambda entry: entry[1]["change_seq"]
+        )
+        has_more = len(merged) > limit
+        merged = merged[:limit]
+
+        last_seq = merged[-1][1]["change_seq"] if merged else since
+        return {
+            "updated": [item for kind, item in merged if kind == "updated"],
+            "deleted": [
+                item["media_id"] if kind == "deleted" else str(item["_id"])
+                for kind, item in merged if kind != "updated"
+            ],
+            "next_token": self.encode_token(last_seq),
+            "has_more": has_more,
+            "reset": reset
+        }
+
+change_log = ChangeLog()
@@ -0,0 +1,164 @@
+from app.config import settings
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from PIL import Image
+from typing import Any, Dict, List, Optional, Tuple
+import asyncio
+import io
+import math
+
+BASE83 = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz#$%*+,-.:;=?@[]^_{|}~"
+
+# EXIF tags
+ORIENTATION = 0x0112
+DATETIME = 0x0132
+EXIF_IFD = 0x8769
+DATETIME_ORIGINAL = 0x9003
+
+# Orientations 5-8 are rotated by 90 degrees, so width and height swap on display
+TRANSPOSED_ORIENTATIONS = {5, 6, 7, 8}
+
+# Same mapping as PIL.ImageOps.exif_transpose, applied to the thumbnail only
+ORIENTATION_TRANSPOSE = {
+    2: "FLIP_LEFT_RIGHT",
+    3: "ROTATE_180",
+    4: "FLIP_TOP_BOTTOM",
+    5: "TRANSPOSE",
+    6: "ROTATE_270",
+    7: "TRANSVERSE",
+    8: "ROTATE_90",
+}
+
+def _base83(value: int, length: int) -> str:
+    return "".join(BASE83[(value // 83 ** (length - i - 1)) % 83] for i in range(length))
+
+def _srgb_to_linear(value: int) -> float:
+    v = value / 255
+    return v / 12.92 if v <= 0.04045 else ((v + 0.055) / 1.055) ** 2.4
+
+def _linear_to_srgb(value: float) -> int:
+    v = max(0.0, min(1.0, value))
+    if v <= 0.0031308:
+        return int(v * 12.92 * 255 + 0.5)
+    return int((1.055 * v ** (1 / 2.4) - 0.055) * 255 + 0.5)
+
+def _sign_pow(value: float, exponent: float) -> float:
+    return math.copysign(abs(value) ** exponent, value)
+
+def blurhash(pixels: List[Tuple[int, int, int]], width: int, height: int, x_components: int = 4, y_components: int = 3) -> str:
+    """Encode RGB pixels (row-major) as a BlurHash string"""
+    linear = [(_srgb_to_linear(r), _srgb_to_linear(g), _srgb_to_linear(b)) for r, g, b in pixels]
+    cos_x = [[math.cos(math.pi * i * x / width) for x in range(width)] for i in range(x_components)]
+    cos_y = [[math.cos(math.pi * j * y / height) for y in range(height)] for j in range(y_components)]
+
+    factors = []
+    for j in range(y_components):
+        for i in range(x_components):
+            normalisation = 1 if i == 0 and j == 0 else 2
+            r = g = b = 0.0
+            for y in range(height):
+                row = y * width
+                cy = cos_y[j][y]
+                for x in range(width):
+                    basis = cos_x[i][x] * cy
+                    pr, pg, pb = linear[row + x]
+                    r += basis * pr
+                    g += basis * pg
+                    b += basis * pb
+            scale = normalisation / (width * height)
+            factors.append((r * scale, g * scale, b * scale))
+
+    dc, ac = factors[0], factors[1:]
+    result = _base83((x_components - 1) + (y_components - 1) * 9, 1)
+
+    if ac:
+        actual_max = max(abs(v) for factor in ac for v in factor)
+        quantised_max = max(0, min(82, int(math.floor(actual_max * 166 - 0.5))))
+        max_value = (quantised_max + 1) / 166
+        result += _base83(quantised_max, 1)
+    else:
+        max_value = 1.0
+        result += _base83(0, 1)
+
+    result += _base83(
+        (_linear_to_srgb(dc[0]) << 16) + (_linear_to_srgb(dc[1]) << 8) + _linear_to_srgb(dc[2]), 4
+    )
+    for factor in ac:
+        r, g, b = (
+            max(0, min(18, int(math.floor(_sign_pow(v / max_value, 0.5) * 9 + 9.5))))
+            for v in factor
+        )
+        result += _base83(r * 19 * 19 + g * 19 + b, 2)
+    return result
+
+def _parse_exif_datetime(value: Any) -> Optional[datetime]:
+    if not isinstance(value, str):
+        return None
+    try:
+        return datetime.strptime(value.strip("\x00 "), "%Y:%m:%d %H:%M:%S")
+    except ValueError:
+        return None
+
+def extract_image_metadata(contents: bytes) -> Dict[str, Any]:
+    """Read layout and placeholder metadata from an encoded image (blocking)"""
+    with Image.open(io.BytesIO(contents)) as image:
+        width, height = image.size
+        exif = image.getexif()
+        orientation = exif.get(ORIENTATION) or 1
+        captured_at = (
+            _parse_exif_datetime(exif.get_ifd(EXIF_IFD).get(DATETIME_ORIGINAL))
+            or _parse_exif_datetime(exif.get(DATETIME))
+        )
+
+        # JPEG draft mode decodes at reduced scale, which is far cheaper
+        image.draft("RGB", (64, 64))
+        thumbnail = image.convert("RGB")
+        thumbnail.thumbnail((32, 32))
+
+    if orientation in TRANSPOSED_ORIENTATIONS:
+        width, height = height, width
+    if orientation in ORIENTATION_TRANSPOSE:
+        thumbnail = thumbnail.transpose(getattr(Image.Transpose, ORIENTATION_TRANSPOSE[orientation]))
+
+    # Most common colour after reducing to a small palette
+    palette_image = thumbnail.quantize(colors=5)
+    palette = palette_image.getpalette()
+    _, index = max(palette_image.getcolors())
+    dominant = palette[index * 3:index * 3 + 3]
+
+    data = thumbnail.tobytes()
+    pixels = list(zip(data[0::3], data[1::3], data[2::3]))
+
+    return {
+        "width": width,
+        "height": height,
+        "orientation": orientation,
+        "captured_at": captured_at,
+        "dominant_color": "#{:02x}{:02x}{:02x}".format(*dominant),
+        "blurhash": blurhash(pixels, thumbnail.width, thumbnail.height)
+    }
+
+class ImageMetadataService:
+    """Extract image metadata at upload time on a small worker pool.
+
+    Decoding happens in Pillow's C code, which releases the GIL, so a thread
+    pool keeps the event loop free without the cost of copying uploads into
+    worker processes.
+    """
+
+    def __init__(self):
+        self.executor = ThreadPoolExecutor(
+            max_workers=settings.IMAGE_METADATA_WORKERS,
+            thread_name_prefix="image-metadata"
+        )
+
+    async def extract(self, contents: bytes) -> Dict[str, Any]:
+        """Return metadata fields for the media document ({} if unavailable)"""
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, extract_image_metadata, contents)
+        except Exception as e:
+            print(f"Image metadata extraction failed: {e}")
+            return {}
+
+image_metadata_service = ImageMetadataService()
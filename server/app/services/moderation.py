@@ -15,7 +15,8 @@ class ModerationService:
             return {
                 "is_safe": True,
                 "confidence": 0.0,
-                "categories": {}
+                "categories": {},
+                "checked": False
             }
         
         try:
@@ -38,15 +39,29 @@ class ModerationService:
                         return {
                             "is_safe": result.get("is_safe", True),
                             "confidence": result.get("confidence", 0.0),
-                            "categories": result.get("categories", {})
+                            "categories": result.get("categories", {}),
+                            "checked": True
                         }
                     else:
                         print(f"Moderation API error: {response.status}")
-                        return {"is_safe": True, "confidence": 0.0, "categories": {}}
+                        return {"is_safe": True, "confidence": 0.0, "categories": {}, "checked": False}
         
         except Exception as e:
             print(f"Moderation check failed: {e}")
-            return {"is_safe": True, "confidence": 0.0, "categories": {}}
+            return {"is_safe": True, "confidence": 0.0, "categories": {}, "checked": False}
+    
+    async def assess(self, image_content: bytes) -> Dict[str, Any]:
+        """Safety verdict and moderation score from a single API call.
+
+        The score is how likely the image is inappropriate (0.0 = safe,
+        1.0 = inappropriate) and orders the moderation queue. It is None
+        when the API did not give a verdict.
+        """
+        result = await self.check_image(image_content)
+        if not result["checked"]:
+            return {"is_safe": True, "score": None}
+        score = 1.0 - result["confidence"] if result["is_safe"] else result["confidence"]
+        return {"is_safe": result["is_safe"], "score": score}
     
     async def is_appropriate(self, image_content: bytes) -> bool:
         """Check if image is appropriate for wedding context"""
@@ -0,0 +1,126 @@
+from app.config import settings
+from app.database import db
+from app.services.changes import change_log
+from datetime import datetime, timedelta
+from pymongo import ReturnDocument
+from typing import Any, Dict, List, Optional
+
+# Highest moderation score first, then oldest first
+QUEUE_ORDER = [("moderation_score", -1), ("uploaded_at", 1)]
+
+class ModerationQueue:
+    """Work queue of flagged media shared by concurrent reviewers.
+
+    A reviewer claims a batch; each item is leased with an atomic
+    ``find_one_and_update``, so no two reviewers ever hold the same item.
+    Leases that are not resolved within ``MODERATION_LEASE_SECONDS`` lapse
+    and the item goes back to the queue without any cleanup job.
+
+    ``moderation_score`` is the NSFW API's estimate that an image is
+    inappropriate (0.0 = safe, 1.0 = inappropriate). Media it did not score
+    (videos, no API configured, API errors, media from before scoring) is
+    given ``MODERATION_DEFAULT_SCORE``, so it is reviewed between likely and
+    unlikely violations instead of sorting after every scored item.
+    """
+
+    def __init__(self):
+        self.lease = timedelta(seconds=settings.MODERATION_LEASE_SECONDS)
+        self.max_claim = settings.MODERATION_MAX_CLAIM
+        self.default_score = settings.MODERATION_DEFAULT_SCORE
+
+    async def backfill_scores(self, query: Optional[Dict[str, Any]] = None) -> int:
+        """Give flagged media without a score the default score"""
+        result = await db["media"].update_many(
+            {**(query or {}), "status": "flagged", "moderation_score": None},
+            {"$set": {"moderation_score": self.default_score}}
+        )
+        return result.modified_count
+
+    def _unleased(self, now: datetime) -> Dict[str, Any]:
+        return {"$or": [{"lease_until": None}, {"lease_until": {"$lt": now}}]}
+
+    def _available(self, now: datetime) -> Dict[str, Any]:
+        return {"status": "flagged", **self._unleased(now)}
+
+    def _held_by(self, reviewer: str) -> Dict[str, Any]:
+        return {
+            "status": "flagged",
+            "lease_owner": reviewer,
+            "lease_until": {"$gte": datetime.utcnow()}
+        }
+
+    async def claim(self, reviewer: str, limit: int, projection: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Lease up to ``limit`` of the highest-priority unclaimed items to ``reviewer``"""
+        now = datetime.utcnow()
+        lease_until = now + self.lease
+        claimed = []
+        for _ in range(min(limit, self.max_claim)):
+            item = await db["media"].find_one_and_update(
+                self._available(now),
+                {"$set": {"lease_owner": reviewer, "lease_until": lease_until}},
+                projection={**projection, "moderation_score": 1, "lease_until": 1},
+                sort=QUEUE_ORDER,
+                return_document=ReturnDocument.AFTER
+            )
+            if item is None:
+                break
+            claimed.append(item)
+        return claimed
+
+    async def approve(self, media_id: Any, reviewer: str) -> bool:
+        """Approve an item the reviewer holds; False if the lease is not theirs"""
+        return await change_log.update_media(
+            media_id,
+            {
+                "status": "active",
+                "approved": True,
+                "flagged": False,
+                "lease_owner": None,
+                "lease_until": None
+            },
+            conditions=self._held_by(reviewer)
+        )
+
+    async def reject(self, media_id: Any, reviewer: str) -> bool:
+        """Delete an item the reviewer holds; False if the lease is not theirs"""
+        return await change_log.delete_media(media_id, conditions=self._held_by(reviewer)) is not None
+
+    async def approve_unleased(self, media_id: Any) -> bool:
+        """Approve an item outside the queue; False if missing or leased to a reviewer"""
+        return await change_log.update_media(
+            media_id,
+            {
+                "status": "active",
+                "approved": True,
+                "flagged": False,
+                "lease_owner": None,
+                "lease_until": None
+            },
+            conditions=self._unleased(datetime.utcnow())
+        )
+
+    async def reject_unleased(self, media_id: Any) -> bool:
+        """Delete an item outside the queue; False if missing or leased to a reviewer"""
+        return await change_log.delete_media(media_id, conditions=self._unleased(datetime.utcnow())) is not None
+
+    async def is_leased(self, media_id: Any) -> bool:
+        return await db["media"].count_documents(
+            {"_id": media_id, "lease_until": {"$gte": datetime.utcnow()}}, limit=1
+        ) > 0
+
+    async def release(self, media_id: Any, reviewer: str) -> bool:
+        """Hand an item back to the queue before its lease runs out"""
+        result = await db["media"].update_one(
+            {"_id": media_id, **self._held_by(reviewer)},
+            {"$set": {"lease_owner": None, "lease_until": None}}
+        )
+        return result.matched_count > 0
+
+    async def stats(self) -> Dict[str, int]:
+        now = datetime.utcnow()
+        return {
+            "queued": await db["media"].count_documents(self._available(now)),
+            "leased": await db["media"].count_documents({"status": "flagged", "lease_until": {"$gte": now}})
+        }
+
+moderation_queue = ModerationQueue()
@@ -0,0 +1,261 @@
+from app.config import settings
+from app.database import db
+from bson import ObjectId
+from collections import defaultdict
+from datetime import timedelta
+from typing import Any, Dict, List, Optional
+import bisect
+import heapq
+import itertools
+import re
+import time
+
+TOKEN_RE = re.compile(r"\w+")
+
+# Relative weight of a match in each indexed field (mirrors the text index weights)
+FIELD_WEIGHTS = {"title": 3, "theme": 2, "caption": 1}
+
+# Only this many vocabulary terms are expanded for a prefix, to bound query cost
+MAX_PREFIX_EXPANSIONS = 64
+
+# At most this many of the rarest term's documents are scored per query.
+# Queries made only of common words rarely fill a page with perfect scores,
+# so without a bound they would walk postings lists of 100k+ documents.
+MAX_DRIVER_SCAN = 20_000
+
+REFRESH_OVERLAP_SECONDS = 5
+
+def tokenize(text: Optional[str]) -> List[str]:
+    return TOKEN_RE.findall(text.lower()) if text else []
+
+class InvertedIndex:
+    """In-process inverted index from terms to document ids.
+
+    Documents are numbered internally so postings are small ``{number: weight}``
+    dicts, and the vocabulary is kept sorted so prefix lookups are a bisect
+    plus a short scan.
+    """
+
+    def __init__(self):
+        self._docs: List[ObjectId] = []
+        self._doc_numbers: Dict[ObjectId, int] = {}
+        self._postings: Dict[str, Dict[int, int]] = defaultdict(dict)
+        self._vocabulary: List[str] = []
+        self._max_weight = 1
+
+    def __len__(self) -> int:
+        return len(self._doc_numbers)
+
+    def add(self, doc_id: ObjectId, fields: Dict[str, Optional[str]]):
+        """Index a document; ``fields`` maps field name to text.
+
+        Adding a document again merges in its new terms. Terms it no longer
+        contains are only dropped when the index is rebuilt.
+        """
+        number = self._doc_numbers.get(doc_id)
+        if number is None:
+            number = len(self._docs)
+            self._docs.append(doc_id)
+            self._doc_numbers[doc_id] = number
+
+        for field, text in fields.items():
+            weight = FIELD_WEIGHTS.get(field, 1)
+            self._max_weight = max(self._max_weight, weight)
+            for token in tokenize(text):
+                postings = self._postings.get(token)
+                if postings is None:
+                    bisect.insort(self._vocabulary, token)
+                    postings = self._postings[token]
+                postings[number] = max(postings.get(number, 0), weight)
+
+    def _expand(self, prefix: str) -> List[str]:
+        start = bisect.bisect_left(self._vocabulary, prefix)
+        terms = []
+        for token in self._vocabulary[start:start + MAX_PREFIX_EXPANSIONS]:
+            if not token.startswith(prefix):
+                break
+            terms.append(token)
+        return terms
+
+    @staticmethod
+    def _newest_first(postings: Dict[int, int], bonus: int):
+        for number in reversed(postings):
+            yield number, postings[number] * bonus
+
+    @staticmethod
+    def _drive(candidates: List[tuple]):
+        """Yield ``(number, score)`` once per document of the driving term, newest first"""
+        if len(candidates) == 1:
+            # Common case: no prefix expansion, walk the postings dict directly
+            yield from InvertedIndex._newest_first(*candidates[0])
+            return
+
+        merged = heapq.merge(
+            *[InvertedIndex._newest_first(postings, bonus) for postings, bonus in candidates],
+            reverse=True
+        )
+        seen = set()
+        for number, group in itertools.groupby(merged, key=lambda item: item[0]):
+            # Re-added documents can sit out of order in a postings dict
+            if number in seen:
+                continue
+            seen.add(number)
+            yield number, max(item[1] for item in group)
+
+    def search(self, query: str, limit: int) -> List[ObjectId]:
+        """Return up to ``limit`` ids matching every query term, best first.
+
+        Every term must match exactly except the last, which also matches as
+        a prefix so results update while the user is typing. Exact matches
+        score double a prefix match. Only the newest ``MAX_DRIVER_SCAN``
+        documents containing the rarest term are considered, so a query made
+        of several very common words ranks recent matches rather than the
+        whole collection.
+        """
+        terms = tokenize(query)
+        if not terms:
+            return []
+
+        expansions = []
+        for i, term in enumerate(terms):
+            candidates = [(term, 2)]
+            if i == len(terms) - 1:
+                candidates += [(token, 1) for token in self._expand(term) if token != term]
+            candidates = [(self._postings[token], bonus) for token, bonus in candidates if token in self._postings]
+            if not candidates:
+                return []
+            expansions.append(candidates)
+
+        # Walk the rarest term's postings newest first and probe the others.
+        # Once ``limit`` hits have the best possible score, nothing older can
+        # outrank them, so common terms stop after a short scan.
+        expansions.sort(key=lambda candidates: sum(len(postings) for postings, _ in candidates))
+        best_possible = self._max_weight * sum(
+            max(bonus for _, bonus in candidates) for candidates in expansions
+        )
+        # Single-candidate terms are probed with a plain dict lookup
+        probes = [
+            (*candidates[0], None) if len(candidates) == 1 else (None, 0, candidates)
+            for candidates in expansions[1:]
+        ]
+
+        top: List[tuple] = []
+        for number, score in itertools.islice(self._drive(expansions[0]), MAX_DRIVER_SCAN):
+            for postings, bonus, candidates in probes:
+                if postings is not None:
+                    term_score = postings.get(number, 0) * bonus
+                else:
+                    term_score = max(other.get(number, 0) * weight for other, weight in candidates)
+                if not term_score:
+                    break
+                score += term_score
+            else:
+                # Newer documents (higher internal number) win ties
+                if len(top) < limit:
+                    heapq.heappush(top, (score, number))
+                elif (score, number) > top[0]:
+                    heapq.heapreplace(top, (score, number))
+                if len(top) == limit and top[0][0] == best_possible:
+                    break
+
+        return [self._docs[number] for _, number in sorted(top, reverse=True)]
+
+class SearchService:
+    """Search over ``Media.caption`` and ``Album.title``/``theme``.
+
+    Uses the MongoDB text indexes by default. With ``SEARCH_IN_MEMORY``
+    enabled, each worker also keeps an :class:`InvertedIndex` per collection that supports
+    prefix matching; it is built on startup, updated on insert, and catches
+    up with documents inserted by other workers before serving a query.
+    Candidates from the in-memory index are re-read from MongoDB, so
+    anything since deleted, flagged or hidden drops out of the results.
+    """
+
+    def __init__(self):
+        self.in_memory = settings.SEARCH_IN_MEMORY
+        self.refresh_seconds = settings.SEARCH_REFRESH_SECONDS
+        self.indexes = {"media": InvertedIndex(), "albums": InvertedIndex()}
+        self._last_ids: Dict[str, Optional[ObjectId]] = {"media": None, "albums": None}
+        self._last_refresh = 0.0
+
+    def _index_document(self, kind: str, doc: Dict[str, Any]):
+        if kind == "media":
+            self.indexes[kind].add(doc["_id"], {"caption": doc.get("caption")})
+        else:
+            self.indexes[kind].add(doc["_id"], {"title": doc.get("title"), "theme": doc.get("theme")})
+
+    def add_media(self, doc: Dict[str, Any]):
+        """Index a newly inserted media document"""
+        if self.in_memory:
+            self._index_document("media", doc)
+
+    def add_album(self, doc: Dict[str, Any]):
+        """Index a newly inserted or updated album document"""
+        if self.in_memory:
+            self._index_document("albums", doc)
+
+    async def refresh(self, force: bool = False):
+        """Pull documents inserted since the last refresh into the in-memory index"""
+        if not self.in_memory:
+            return
+        if not force and time.monotonic() - self._last_refresh < self.refresh_seconds:
+            return
+        self._last_refresh = time.monotonic()
+
+        projections = {
+            "media": {"_id": 1, "caption": 1},
+            "albums": {"_id": 1, "title": 1, "theme": 1},
+        }
+        for kind, projection in projections.items():
+            query = {}
+            if self._last_ids[kind] is not None:
+                # ObjectIds from different workers are only ordered to the
+                # second, so re-read a small overlap; re-adding is harmless.
+                since = self._last_ids[kind].generation_time - timedelta(seconds=REFRESH_OVERLAP_SECONDS)
+                query["_id"] = {"$gte": ObjectId.from_datetime(since)}
+            async for doc in db[kind].find(query, projection).sort("_id", 1):
+                self._index_document(kind, doc)
+                if isinstance(doc["_id"], ObjectId):
+                    self._last_ids[kind] = doc["_id"]
+
+    async def search(
+        self,
+        query: str,
+        kind: str,
+        filters: Dict[str, Any],
+        projection: Dict[str, Any],
+        page: int,
+        limit: int
+    ) -> List[Dict[str, Any]]:
+        """Return one ranked page of visible ``kind`` documents matching ``query``"""
+        skip = (page - 1) * limit
+
+        if self.in_memory:
+            await self.refresh()
+            # Hidden documents are filtered out by MongoDB, so widen the
+            # candidate window until the requested page is full.
+            fetch = skip + limit
+            while True:
+                ids = self.indexes[kind].search(query, fetch)
+                if not ids:
+                    return []
+                docs = await db[kind].find(
+                    {"_id": {"$in": ids}, **filters},
+                    projection,
+                    max_time_ms=settings.QUERY_TIMEOUT_MS
+                ).to_list(len(ids))
+                if len(docs) >= skip + limit or len(ids) < fetch:
+                    break
+                fetch *= 2
+            rank = {doc_id: i for i, doc_id in enumerate(ids)}
+            docs.sort(key=lambda doc: rank[doc["_id"]])
+            return docs[skip:skip + limit]
+
+        cursor = db[kind].find(
+            {"$text": {"$search": query}, **filters},
+            {**projection, "score": {"$meta": "textScore"}},
+            max_time_ms=settings.QUERY_TIMEOUT_MS
+        ).sort([("score", {"$meta": "textScore"})]).skip(skip)
+        return await cursor.to_list(limit)
+
+search_service = SearchService()
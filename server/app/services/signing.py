@@ -0,0 +1,111 @@
+from app.config import settings
+from app.database import db
+from app.services.storage import storage_service
+from bson import ObjectId
+from functools import lru_cache
+from typing import Any, Dict, List
+import base64
+import hashlib
+import hmac
+import math
+import time
+
+ONE_YEAR = 365 * 24 * 60 * 60
+
+# Fixed expiry for public media (2100-01-01 UTC): the URL never changes, so
+# edge caches keep one copy for the full year max-age
+PUBLIC_EXPIRY = 4102444800
+
+@lru_cache(maxsize=100_000)
+def _signature(secret: str, key: str, expires: int, review: bool = False) -> str:
+    # Cached per (object, expiry bucket): every URL for an object signed
+    # within one bucket is identical, so signing a page is mostly cache hits.
+    message = f"{key}:{expires}:review" if review else f"{key}:{expires}"
+    digest = hmac.new(secret.encode(), message.encode(), hashlib.sha256).digest()
+    return base64.urlsafe_b64encode(digest[:18]).decode()
+
+class UrlSigner:
+    """HMAC-signed, versioned media URLs that a CDN can cache.
+
+    URLs look like ``{CDN_BASE_URL}/media/cdn/{expires}/{signature}/{key}``.
+    Stored objects are immutable (keys are random UUIDs), so public media is
+    signed with one fixed far-future expiry: its URL never changes and can be
+    cached for a year. Private media expires after ``SIGNED_URL_TTL_SECONDS``,
+    rounded up to a bucket boundary so the URL stays byte-for-byte stable for
+    the whole bucket and edge caches keep hitting until it expires. Rotating
+    ``MEDIA_URL_SIGNING_KEY`` invalidates every URL issued so far.
+
+    Media that is not active (flagged, awaiting review) gets a short-lived
+    ``/media/cdn/review/...`` URL served with ``private, no-store``, so a
+    shared cache never holds content that may yet be rejected.
+
+    Clients render ``url`` directly from another origin, so signed URLs must
+    be absolute: signing stays off until ``CDN_BASE_URL`` is set.
+    """
+
+    def __init__(self):
+        self.secret = settings.MEDIA_URL_SIGNING_KEY or settings.JWT_SECRET_KEY
+        self.base_url = settings.CDN_BASE_URL.rstrip("/")
+        self.enabled = settings.SIGNED_URLS_ENABLED and bool(self.base_url)
+        if settings.SIGNED_URLS_ENABLED and not self.base_url:
+            print("Signed media URLs disabled: CDN_BASE_URL is not set")
+        self.bucket_seconds = settings.SIGNED_URL_BUCKET_SECONDS
+        self.private_ttl = settings.SIGNED_URL_TTL_SECONDS
+        self.review_ttl = settings.SIGNED_URL_REVIEW_TTL_SECONDS
+
+    def expiry(self, public: bool, now: float = None) -> int:
+        if public:
+            return PUBLIC_EXPIRY
+        now = time.time() if now is None else now
+        return math.ceil((now + self.private_ttl) / self.bucket_seconds) * self.bucket_seconds
+
+    def sign(self, key: str, expires: int, review: bool = False) -> str:
+        signature = _signature(self.secret, key, expires, review)
+        prefix = "/media/cdn/review" if review else "/media/cdn"
+        return f"{self.base_url}{prefix}/{expires}/{signature}/{key}"
+
+    def verify(self, key: str, expires: int, signature: str, review: bool = False) -> bool:
+        if expires < time.time():
+            return False
+        return hmac.compare_digest(_signature(self.secret, key, expires, review), signature)
+
+    def cache_control(self, expires: int, review: bool = False) -> str:
+        if review:
+            return "private, no-store"
+        max_age = max(0, min(ONE_YEAR, int(expires - time.time())))
+        return f"public, max-age={max_age}, immutable"
+
+    async def sign_media(self, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Replace ``url`` on a page of media documents with signed CDN URLs.
+
+        Album visibility is looked up once for the whole page.
+        """
+        if not self.enabled or not items:
+            return items
+
+        album_ids = {item.get("album_id") for item in items if item.get("album_id")}
+        object_ids = [ObjectId(album_id) for album_id in album_ids if ObjectId.is_valid(album_id)]
+        private = set()
+        if object_ids:
+            albums = await db["albums"].find(
+                {"_id": {"$in": object_ids}, "is_public": False}, {"_id": 1}
+            ).to_list(len(object_ids))
+            private = {str(album["_id"]) for album in albums}
+
+        now = time.time()
+        public_expiry = self.expiry(True, now)
+        private_expiry = self.expiry(False, now)
+        # Not bucketed: review URLs are never cached, so they need not be stable
+        review_expiry = int(now) + self.review_ttl
+        for item in items:
+            key = item.get("storage_key") or (storage_service.key_from_url(item["url"]) if item.get("url") else None)
+            if not key:
+                continue
+            if item.get("status") != "active":
+                item["url"] = self.sign(key, review_expiry, review=True)
+                continue
+            expires = private_expiry if item.get("album_id") in private else public_expiry
+            item["url"] = self.sign(key, expires)
+        return items
+
+url_signer = UrlSigner()
@@ -1,8 +1,11 @@
 import boto3
 from supabase import create_client
 from app.config import settings
-from typing import Optional
+from datetime import datetime
+from typing import AsyncIterator, List, Optional, Tuple
+import asyncio
 import os
+import shutil
 
 class StorageService:
     def __init__(self):
@@ -41,6 +44,44 @@ class StorageService:
         else:
             return await self._upload_to_local(file_content, filename)
     
+    async def upload_staged_file(self, file_path: str, filename: str, content_type: str = "auto") -> str:
+        """Upload a file already staged on local disk and return URL.
+
+        The file is streamed from disk rather than read into memory, so this
+        is safe for large videos. The staged file is consumed either way.
+        """
+        try:
+            if self.storage_type == "supabase":
+                try:
+                    # Pass an open file: httpx sends it as a chunked multipart
+                    # stream, where a path would be opened and never closed
+                    with open(file_path, "rb") as f:
+                        await asyncio.to_thread(
+                            self.supabase.storage.from_(settings.SUPABASE_BUCKET).upload,
+                            filename, f, {"content-type": content_type}
+                        )
+                    return f"{settings.SUPABASE_URL}/storage/v1/object/public/{settings.SUPABASE_BUCKET}/{filename}"
+                except Exception as e:
+                    print(f"Supabase upload failed: {e}")
+            elif self.storage_type == "s3":
+                try:
+                    # upload_file switches to S3 multipart upload for large files
+                    await asyncio.to_thread(
+                        self.s3_client.upload_file,
+                        file_path, settings.AWS_S3_BUCKET, filename,
+                        ExtraArgs={"ContentType": content_type}
+                    )
+                    return f"https://{settings.AWS_S3_BUCKET}.s3.{settings.AWS_REGION}.amazonaws.com/{filename}"
+                except Exception as e:
+                    print(f"S3 upload failed: {e}")
+
+            os.makedirs("media_storage", exist_ok=True)
+            shutil.move(file_path, os.path.join("media_storage", filename))
+            return f"/media_storage/{filename}"
+        finally:
+            if os.path.exists(file_path):
+                os.remove(file_path)
+
     async def _upload_to_supabase(self, file_content: bytes, filename: str, content_type: str) -> str:
         """Upload to Supabase Storage"""
         try:
@@ -92,4 +133,120 @@ class StorageService:
             print(f"Delete failed: {e}")
             return False
 
-storage_service = StorageService() 
\ No newline at end of file
+    def key_from_url(self, url: str) -> str:
+        """Recover the storage key from a URL returned by upload_file"""
+        return url.split("?")[0].rsplit("/", 1)[-1]
+
+    async def delete_files(self, filenames: List[str]) -> bool:
+        """Delete a batch of files from storage in as few requests as possible"""
+        if not filenames:
+            return True
+        try:
+            if self.storage_type == "supabase":
+                await asyncio.to_thread(
+                    self.supabase.storage.from_(settings.SUPABASE_BUCKET).remove, filenames
+                )
+            elif self.storage_type == "s3":
+                # delete_objects accepts at most 1000 keys per request
+                for i in range(0, len(filenames), 1000):
+                    await asyncio.to_thread(
+                        self.s3_client.delete_objects,
+                        Bucket=settings.AWS_S3_BUCKET,
+                        Delete={
+                            "Objects": [{"Key": key} for key in filenames[i:i + 1000]],
+                            "Quiet": True
+                        }
+                    )
+            else:
+                for filename in filenames:
+                    file_path = os.path.join("media_storage", filename)
+                    if os.path.exists(file_path):
+                        os.remove(file_path)
+            return True
+        except Exception as e:
+            print(f"Batch delete failed: {e}")
+            return False
+
+    async def stream_file(self, filename: str, chunk_size: int = 1024 * 1024) -> AsyncIterator[bytes]:
+        """Yield a stored file's bytes in chunks (used to serve CDN origin requests)"""
+        if self.storage_type == "supabase":
+            # The Supabase client only downloads whole objects
+            yield await asyncio.to_thread(
+                self.supabase.storage.from_(settings.SUPABASE_BUCKET).download, filename
+            )
+        elif self.storage_type == "s3":
+            response = await asyncio.to_thread(
+                self.s3_client.get_object, Bucket=settings.AWS_S3_BUCKET, Key=filename
+            )
+            body = response["Body"]
+            try:
+                while True:
+                    chunk = await asyncio.to_thread(body.read, chunk_size)
+                    if not chunk:
+                        return
+                    yield chunk
+            finally:
+                body.close()
+        else:
+            with open(os.path.join("media_storage", filename), "rb") as f:
+                while True:
+                    chunk = f.read(chunk_size)
+                    if not chunk:
+                        return
+                    yield chunk
+
+    async def iter_files(self, page_size: int = 1000) -> AsyncIterator[List[Tuple[str, datetime]]]:
+        """Yield the stored files as pages of (filename, last modified UTC) pairs.
+
+        Pages are fetched lazily so the full listing is never held in memory.
+        The Supabase listing is paged by offset, so callers must not delete
+        files while iterating (the listing would shift under them).
+        """
+        if self.storage_type == "supabase":
+            bucket = self.supabase.storage.from_(settings.SUPABASE_BUCKET)
+            offset = 0
+            while True:
+                items = await asyncio.to_thread(bucket.list, None, {
+                    "limit": page_size,
+                    "offset": offset,
+                    "sortBy": {"column": "name", "order": "asc"}
+                })
+                # Folders come back without an id; media is stored at the bucket root
+                page = [
+                    (item["name"], datetime.fromisoformat(item["created_at"].replace("Z", "+00:00")).replace(tzinfo=None))
+                    for item in items if item.get("id")
+                ]
+                if page:
+                    yield page
+                if len(items) < page_size:
+                    return
+                offset += page_size
+        elif self.storage_type == "s3":
+            kwargs = {"Bucket": settings.AWS_S3_BUCKET, "MaxKeys": page_size}
+            while True:
+                response = await asyncio.to_thread(self.s3_client.list_objects_v2, **kwargs)
+                page = [
+                    (item["Key"], item["LastModified"].replace(tzinfo=None))
+                    for item in response.get("Contents", [])
+                ]
+                if page:
+                    yield page
+                if not response.get("IsTruncated"):
+                    return
+                kwargs["ContinuationToken"] = response["NextContinuationToken"]
+        else:
+            if not os.path.isdir("media_storage"):
+                return
+            page = []
+            with os.scandir("media_storage") as entries:
+                for entry in entries:
+                    if not entry.is_file():
+                        continue
+                    page.append((entry.name, datetime.utcfromtimestamp(entry.stat().st_mtime)))
+                    if len(page) >= page_size:
+                        yield page
+                        page = []
+            if page:
+                yield page
+
+storage_service = StorageService()
\ No newline at end of file
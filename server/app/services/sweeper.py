@@ -0,0 +1,241 @@
+from app.config import settings
+from app.database import db
+from app.services.storage import storage_service
+from datetime import datetime, timedelta
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from typing import Any, Dict, Optional
+import asyncio
+import uuid
+
+class AlbumSweeper:
+    """Background job that deletes expired or deleted albums, their media and stored files.
+
+    Work is done in small batches with a pause in between so the sweep never
+    competes with live traffic. Only one worker sweeps at a time (a lease on
+    the ``sweeper_state`` document), and the album being swept is
+    checkpointed there so a crashed sweep resumes where it stopped.
+
+    The same loop periodically garbage-collects stored files that no
+    ``media`` document points at.
+    """
+
+    STATE_ID = "album_expiry"
+    GC_STATE_ID = "orphan_gc"
+
+    def __init__(self):
+        self.worker_id = uuid.uuid4().hex
+        self.batch_size = settings.SWEEPER_BATCH_SIZE
+        self.batch_delay = settings.SWEEPER_BATCH_DELAY_SECONDS
+        self.interval = settings.SWEEPER_INTERVAL_SECONDS
+        self.lease = timedelta(seconds=settings.SWEEPER_LEASE_SECONDS)
+        self.gc_interval = timedelta(seconds=settings.ORPHAN_GC_INTERVAL_SECONDS)
+        self.gc_min_age = timedelta(seconds=settings.ORPHAN_GC_MIN_AGE_SECONDS)
+        self._task: Optional[asyncio.Task] = None
+        self._wake = asyncio.Event()
+        self._next_gc = datetime.utcnow() + self.gc_interval
+
+    def start(self):
+        """Schedule the sweep loop on the running event loop"""
+        if settings.SWEEPER_ENABLED and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def wake(self):
+        """Start the next sweep now instead of waiting for the interval"""
+        self._wake.set()
+
+    async def _run(self):
+        while True:
+            try:
+                await self.sweep()
+                if datetime.utcnow() >= self._next_gc:
+                    self._next_gc = datetime.utcnow() + self.gc_interval
+                    await self.collect_orphans()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Album sweep failed: {e}")
+
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+    async def _acquire_lease(self, state_id: str = STATE_ID) -> Optional[Dict[str, Any]]:
+        """Take (or renew) a sweeper lease; returns the state or None if held elsewhere"""
+        now = datetime.utcnow()
+        try:
+            return await db["sweeper_state"].find_one_and_update(
+                {
+                    "_id": state_id,
+                    "$or": [
+                        {"owner": self.worker_id},
+                        {"lease_until": {"$lt": now}},
+                        {"lease_until": {"$exists": False}}
+                    ]
+                },
+                {"$set": {"owner": self.worker_id, "lease_until": now + self.lease}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+        except DuplicateKeyError:
+            # Another worker holds a live lease
+            return None
+
+    async def _checkpoint(self, album_id: Optional[str], deleted: int = 0):
+        await db["sweeper_state"].update_one(
+            {"_id": self.STATE_ID, "owner": self.worker_id},
+            {
+                "$set": {"album_id": album_id, "updated_at": datetime.utcnow()},
+                "$inc": {"media_deleted": deleted}
+            }
+        )
+
+    async def _next_album(self, state: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        # Finish the album a previous (possibly crashed) sweep was working on first
+        if state.get("album_id"):
+            album = await db["albums"].find_one({"_id": state["album_id"]}, {"_id": 1})
+            if album:
+                return album
+        album = await db["albums"].find_one({"deleted": True}, {"_id": 1})
+        if album:
+            return album
+        return await db["albums"].find_one(
+            {"expires_at": {"$lte": datetime.utcnow()}},
+            {"_id": 1},
+            sort=[("expires_at", 1)]
+        )
+
+    async def sweep(self) -> int:
+        """Sweep every expired or deleted album; returns the number of albums removed"""
+        swept = 0
+        while True:
+            state = await self._acquire_lease()
+            if state is None:
+                return swept
+
+            album = await self._next_album(state)
+            if album is None:
+                await db["sweeper_state"].update_one(
+                    {"_id": self.STATE_ID, "owner": self.worker_id},
+                    {"$set": {"album_id": None, "lease_until": datetime.utcnow()}}
+                )
+                return swept
+
+            await self._checkpoint(album["_id"])
+            if not await self.purge_album(album["_id"]):
+                return swept
+            await db["albums"].delete_one({"_id": album["_id"]})
+            await self._checkpoint(None)
+            swept += 1
+
+    async def purge_album(self, album_id: Any) -> bool:
+        """Delete an album's media documents and stored files in batches.
+
+        Returns False if the lease was lost part-way; the new lease holder
+        picks the album up from the checkpoint.
+        """
+        while True:
+            batch = await db["media"].find(
+                {"album_id": str(album_id)},
+                {"_id": 1, "url": 1, "storage_key": 1}
+            ).to_list(self.batch_size)
+            if not batch:
+                return True
+
+            # Remove the files before the documents: if we crash in between,
+            # the next pass deletes the same (now missing) files again rather
+            # than leaving blobs with nothing pointing at them.
+            keys = [
+                item.get("storage_key") or storage_service.key_from_url(item["url"])
+                for item in batch if item.get("storage_key") or item.get("url")
+            ]
+            if not await storage_service.delete_files(keys):
+                return False
+            await db["media"].delete_many({"_id": {"$in": [item["_id"] for item in batch]}})
+            await self._checkpoint(album_id, len(batch))
+
+            # Renew the lease and yield to live traffic between batches
+            if await self._acquire_lease() is None:
+                return False
+            await asyncio.sleep(self.batch_delay)
+
+    async def _backfill_storage_keys(self):
+        """Record storage_key on media documents written before it existed"""
+        while True:
+            batch = await db["media"].find(
+                {"storage_key": {"$exists": False}, "url": {"$exists": True}},
+                {"_id": 1, "url": 1}
+            ).to_list(self.batch_size)
+            if not batch:
+                return
+            for item in batch:
+                await db["media"].update_one(
+                    {"_id": item["_id"]},
+                    {"$set": {"storage_key": storage_service.key_from_url(item["url"])}}
+                )
+            await asyncio.sleep(self.batch_delay)
+
+    async def collect_orphans(self) -> int:
+        """Delete stored files that no media document references.
+
+        The storage listing is streamed page by page and each page is checked
+        against ``media.storage_key`` with one indexed ``$in`` query, so only
+        the orphans (not the whole bucket) are held in memory. Files younger
+        than ``ORPHAN_GC_MIN_AGE_SECONDS`` are skipped because an upload writes
+        its file before inserting its media document.
+
+        Nothing is deleted until the scan is complete: the Supabase listing
+        is paged by offset, so deleting from a page just read would shift the
+        files behind it and the next page would skip that many.
+        """
+        if await self._acquire_lease(self.GC_STATE_ID) is None:
+            return 0
+
+        await self._backfill_storage_keys()
+
+        orphans = []
+        cutoff = datetime.utcnow() - self.gc_min_age
+        async for page in storage_service.iter_files(self.batch_size):
+            candidates = [key for key, modified in page if modified < cutoff]
+            if candidates:
+                referenced = await db["media"].distinct(
+                    "storage_key", {"storage_key": {"$in": candidates}}
+                )
+                orphans.extend(sorted(set(candidates) - set(referenced)))
+
+            if await self._acquire_lease(self.GC_STATE_ID) is None:
+                return 0
+            await asyncio.sleep(self.batch_delay)
+
+        removed = 0
+        for i in range(0, len(orphans), self.batch_size):
+            batch = orphans[i:i + self.batch_size]
+            # A media document may have been restored since the scan
+            referenced = set(await db["media"].distinct(
+                "storage_key", {"storage_key": {"$in": batch}}
+            ))
+            batch = [key for key in batch if key not in referenced]
+            if batch and await storage_service.delete_files(batch):
+                removed += len(batch)
+
+            if await self._acquire_lease(self.GC_STATE_ID) is None:
+                break
+            await asyncio.sleep(self.batch_delay)
+
+        await db["sweeper_state"].update_one(
+            {"_id": self.GC_STATE_ID, "owner": self.worker_id},
+            {
+                "$set": {"lease_until": datetime.utcnow(), "updated_at": datetime.utcnow()},
+                "$inc": {"files_deleted": removed}
+            }
+        )
+        return removed
+
+album_sweeper = AlbumSweeper()
@@ -0,0 +1,177 @@
+from app.config import settings
+from app.database import db
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Dict, Any, Optional
+import base64
+import os
+import time
+import uuid
+
+class LockLost(Exception):
+    """Raised when an upload's lease lapsed while a request was appending to it"""
+
+class StagedFileMissing(Exception):
+    """Raised when an upload's staged bytes are not on this instance's disk"""
+
+class UploadService:
+    """Resumable (tus-style) uploads staged on local disk.
+
+    The confirmed offset is stored on the ``uploads`` document and advanced
+    as bytes are appended: whatever reached the disk before a connection
+    dropped is kept, and the client resumes from that offset. The staged
+    bytes themselves live on one instance's disk, so if they are missing
+    (the request reached another instance, or the disk was cleaned) the
+    upload is reported gone rather than silently restarting at 0.
+
+    Only one request may append to an upload at a time. A PATCH takes a
+    lease on the session document before checking the offset and holds it
+    until its body is written, so a client retrying while its previous
+    request is still half-open cannot interleave bytes. The lease is renewed
+    while data keeps arriving and lapses on its own if the worker dies.
+    """
+
+    def __init__(self):
+        self.staging_dir = settings.UPLOAD_STAGING_DIR
+        self.max_size = settings.UPLOAD_MAX_SIZE
+        self.lock_lease = timedelta(seconds=settings.UPLOAD_LOCK_SECONDS)
+
+    def parse_metadata(self, header: Optional[str]) -> Dict[str, str]:
+        """Decode a tus ``Upload-Metadata`` header (``key b64value,...``)"""
+        metadata = {}
+        if not header:
+            return metadata
+
+        for pair in header.split(","):
+            parts = pair.strip().split(" ", 1)
+            if not parts[0]:
+                continue
+            value = ""
+            if len(parts) == 2:
+                try:
+                    value = base64.b64decode(parts[1]).decode("utf-8")
+                except Exception:
+                    value = ""
+            metadata[parts[0]] = value
+        return metadata
+
+    def staged_path(self, upload_id: str) -> str:
+        return os.path.join(self.staging_dir, upload_id)
+
+    async def create_session(self, length: int, metadata: Dict[str, str]) -> Dict[str, Any]:
+        """Register a new upload and create its empty staging file"""
+        await self.purge_stale_sessions()
+
+        os.makedirs(self.staging_dir, exist_ok=True)
+        now = datetime.utcnow()
+        session = {
+            "_id": uuid.uuid4().hex,
+            "length": length,
+            "filename": metadata.get("filename") or "upload",
+            "content_type": metadata.get("filetype") or "application/octet-stream",
+            "caption": metadata.get("caption"),
+            "album_id": metadata.get("album_id"),
+            "offset": 0,
+            "created_at": now,
+            "updated_at": now,
+        }
+        open(self.staged_path(session["_id"]), "wb").close()
+        await db["uploads"].insert_one(session)
+        return session
+
+    async def get_session(self, upload_id: str) -> Optional[Dict[str, Any]]:
+        return await db["uploads"].find_one({"_id": upload_id})
+
+    async def acquire_lock(self, upload_id: str) -> Optional[str]:
+        """Lease the upload to the calling request; None if another request holds it"""
+        now = datetime.utcnow()
+        token = uuid.uuid4().hex
+        session = await db["uploads"].find_one_and_update(
+            {
+                "_id": upload_id,
+                "$or": [{"lock_until": None}, {"lock_until": {"$lt": now}}]
+            },
+            {"$set": {"lock_owner": token, "lock_until": now + self.lock_lease}},
+            projection={"_id": 1}
+        )
+        return token if session else None
+
+    async def release_lock(self, upload_id: str, token: str):
+        await db["uploads"].update_one(
+            {"_id": upload_id, "lock_owner": token},
+            {"$set": {"lock_owner": None, "lock_until": None}}
+        )
+
+    def get_offset(self, session: Dict[str, Any]) -> int:
+        """Confirmed offset of an upload; raises ``StagedFileMissing`` if its bytes are gone"""
+        path = self.staged_path(session["_id"])
+        if not os.path.exists(path):
+            raise StagedFileMissing("Staged upload data is missing")
+        size = os.path.getsize(path)
+        # Sessions created before the offset was stored rely on the file size
+        offset = session.get("offset", size)
+        if size < offset:
+            raise StagedFileMissing("Staged upload data is incomplete")
+        return offset
+
+    async def _confirm_offset(self, upload_id: str, offset: int, token: str) -> bool:
+        result = await db["uploads"].update_one(
+            {"_id": upload_id, "lock_owner": token},
+            {"$set": {
+                "offset": offset,
+                "lock_until": datetime.utcnow() + self.lock_lease,
+                "updated_at": datetime.utcnow()
+            }}
+        )
+        return result.matched_count > 0
+
+    async def append_chunk(self, session: Dict[str, Any], chunks: AsyncIterator[bytes], token: str) -> int:
+        """Append a request body to the staged file and return the new offset.
+
+        The caller must hold the upload's lock (``token``). Bytes are flushed
+        as they arrive, so if the client disconnects mid-chunk everything
+        received so far still counts towards the offset. Raises
+        ``ValueError`` if the body would run past ``Upload-Length`` and
+        ``LockLost`` if the lease lapsed and another request took over.
+        """
+        path = self.staged_path(session["_id"])
+        offset = self.get_offset(session)
+        renew_every = self.lock_lease.total_seconds() / 3
+        renewed_at = time.monotonic()
+        try:
+            with open(path, "r+b") as f:
+                # Drop bytes written after the last confirmed offset (a worker
+                # that died mid-append never confirmed them)
+                f.truncate(offset)
+                f.seek(offset)
+                async for chunk in chunks:
+                    if offset + len(chunk) > session["length"]:
+                        raise ValueError("Chunk exceeds declared upload length")
+                    # Renewing the lease also records the offset reached so far
+                    if time.monotonic() - renewed_at > renew_every:
+                        if not await self._confirm_offset(session["_id"], offset, token):
+                            raise LockLost("Upload lock lost while appending")
+                        renewed_at = time.monotonic()
+                    f.write(chunk)
+                    f.flush()
+                    offset += len(chunk)
+        finally:
+            await self._confirm_offset(session["_id"], offset, token)
+        return offset
+
+    async def delete_session(self, upload_id: str):
+        """Drop the session document and its staged file"""
+        path = self.staged_path(upload_id)
+        if os.path.exists(path):
+            os.remove(path)
+        await db["uploads"].delete_one({"_id": upload_id})
+
+    async def purge_stale_sessions(self):
+        """Remove sessions that have not received data within the TTL"""
+        cutoff = datetime.utcnow() - timedelta(hours=settings.UPLOAD_SESSION_TTL_HOURS)
+        stale = await db["uploads"].find(
+            {"updated_at": {"$lt": cutoff}}, {"_id": 1}
+        ).to_list(100)
+        for session in stale:
+            await self.delete_session(session["_id"])
+
+upload_service = UploadService()
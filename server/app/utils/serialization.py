@@ -0,0 +1,27 @@
+from bson import ObjectId
+from datetime import date, datetime
+from fastapi.responses import JSONResponse
+from typing import Any
+import orjson
+
+def _default(value: Any) -> Any:
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def dumps(content: Any) -> bytes:
+    """Encode MongoDB documents to JSON in one pass.
+
+    ObjectIds become strings and datetimes ISO 8601 strings, the same output
+    FastAPI's ``jsonable_encoder`` would produce, without walking the
+    documents twice.
+    """
+    return orjson.dumps(content, default=_default)
+
+class FastJSONResponse(JSONResponse):
+    """JSON response that skips ``jsonable_encoder`` and encodes with :func:`dumps`"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
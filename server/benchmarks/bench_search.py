@@ -0,0 +1,66 @@
+"""Microbenchmark: in-memory caption search (SEARCH_IN_MEMORY).
+
+Builds an InvertedIndex over synthetic captions (1M by default) and reports
+p50/p95 latency for a mix of rare, common, many-term and prefix queries. The
+target is p95 under 20 ms for a 20-result page.
+
+Run from the server directory:
+    python benchmarks/bench_search.py [captions]
+"""
+import os
+import random
+import sys
+import time
+
+from bson import ObjectId
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.search import InvertedIndex  # noqa: E402
+
+CAPTIONS = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+WORDS_PER_CAPTION = 6
+PAGE_SIZE = 20
+ROUNDS = 20
+
+# A long tail of rare words plus a handful of very common wedding words
+COMMON = ["first", "dance", "cake", "ring", "kiss", "vows", "bride", "groom", "party"]
+VOCABULARY = [f"w{i}" for i in range(50_000)] + COMMON * 2_000
+
+QUERIES = [
+    "w123",
+    "cake",
+    "first dance",
+    "vows ring",
+    "bride groom kiss",
+    "kiss cake bride groom",
+    "first da",
+    "w12",
+]
+
+def build_index():
+    random.seed(1)
+    index = InvertedIndex()
+    for _ in range(CAPTIONS):
+        index.add(ObjectId(), {"caption": " ".join(random.choices(VOCABULARY, k=WORDS_PER_CAPTION))})
+    return index
+
+def percentile(samples, p):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * p))]
+
+def main():
+    start = time.perf_counter()
+    index = build_index()
+    print(f"{CAPTIONS} captions indexed in {time.perf_counter() - start:.1f} s")
+    print(f"{'query':<24} {'hits':>5} {'p50 ms':>8} {'p95 ms':>8}")
+    for query in QUERIES:
+        samples = []
+        for _ in range(ROUNDS):
+            start = time.perf_counter()
+            hits = index.search(query, PAGE_SIZE)
+            samples.append((time.perf_counter() - start) * 1000)
+        print(f"{query:<24} {len(hits):>5} {percentile(samples, 0.5):>8.2f} {percentile(samples, 0.95):>8.2f}")
+
+if __name__ == "__main__":
+    main()
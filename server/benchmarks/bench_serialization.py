@@ -0,0 +1,70 @@
+"""Microbenchmark: serializing a page of 1000 media documents.
+
+Compares the old path (stringify ``_id`` in a dict comprehension, then
+FastAPI's ``jsonable_encoder`` + ``json.dumps``) with ``app.utils.serialization.dumps``.
+
+Run from the server directory:
+    python benchmarks/bench_serialization.py
+"""
+import json
+import os
+import sys
+import timeit
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.serialization import dumps  # noqa: E402
+
+PAGE_SIZE = 1000
+ROUNDS = 50
+
+def make_page():
+    now = datetime.utcnow()
+    return [
+        {
+            "_id": ObjectId(),
+            "album_id": str(ObjectId()),
+            "uploaded_by": str(ObjectId()),
+            "filename": f"IMG_{i:04d}.jpg",
+            "type": "photo",
+            "url": f"https://cdn.example.com/media/cdn/1760000000/abcdefghijklmnopqrstuvwx/{ObjectId()}.jpg",
+            "caption": "First dance under the lights",
+            "status": "active",
+            "approved": True,
+            "flagged": False,
+            "uploaded_at": now - timedelta(minutes=i),
+            "captured_at": now - timedelta(hours=1, minutes=i),
+            "width": 4032,
+            "height": 3024,
+            "orientation": 1,
+            "dominant_color": "#c8a27a",
+            "blurhash": "LEHV6nWB2yk8pyo0adR*.7kCMdnj"
+        }
+        for i in range(PAGE_SIZE)
+    ]
+
+def old_path(page):
+    items = [{key: (str(value) if key == "_id" else value) for key, value in item.items()} for item in page]
+    return json.dumps(jsonable_encoder(items), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+def new_path(page):
+    return dumps(page)
+
+def main():
+    page = make_page()
+    assert json.loads(old_path(page)) == json.loads(new_path(page))
+
+    print(f"{PAGE_SIZE} documents, best of {ROUNDS} rounds")
+    results = {}
+    for name, fn in (("jsonable_encoder", old_path), ("dumps", new_path)):
+        best = min(timeit.repeat(lambda: fn(page), number=1, repeat=ROUNDS))
+        results[name] = best
+        print(f"  {name:<18} {best * 1000:8.2f} ms")
+    print(f"  speedup            {results['jsonable_encoder'] / results['dumps']:8.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+import importlib
+
+import mongomock.collection
+import pytest
+from fastapi.testclient import TestClient
+from mongomock_motor import AsyncMongoMockClient
+
+import app.database as database
+
+# Modules that bind ``db`` at import time
+DB_MODULES = [
+    "app.services.uploads",
+    "app.services.changes",
+    "app.services.search",
+    "app.services.signing",
+    "app.services.sweeper",
+    "app.services.moderation_queue",
+    "app.routers.media",
+    "app.routers.album",
+    "app.routers.users",
+]
+
+# pymongo 4.11+ passes ``sort`` to bulk update ops, which mongomock does not accept yet
+_add_update = mongomock.collection.BulkOperationBuilder.add_update
+
+def _add_update_ignoring_sort(self, *args, sort=None, **kwargs):
+    return _add_update(self, *args, **kwargs)
+
+mongomock.collection.BulkOperationBuilder.add_update = _add_update_ignoring_sort
+
+@pytest.fixture
+def fake_db(monkeypatch):
+    fake = AsyncMongoMockClient()["wedding_test"]
+    monkeypatch.setattr(database, "db", fake)
+    monkeypatch.setattr(database, "analytics_db", fake)
+    for name in DB_MODULES:
+        monkeypatch.setattr(importlib.import_module(name), "db", fake)
+    return fake
+
+@pytest.fixture
+def app(fake_db, tmp_path, monkeypatch):
+    from app.main import app
+    from app.services.storage import storage_service
+    from app.services.uploads import upload_service
+
+    # Staged uploads and local storage both live under the test's tmp dir
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(upload_service, "staging_dir", str(tmp_path / "upload_staging"))
+    monkeypatch.setattr(storage_service, "storage_type", "local")
+    return app
+
+@pytest.fixture
+def client(app):
+    # Not used as a context manager, so startup hooks (indexes, sweeper) do not run
+    return TestClient(app)
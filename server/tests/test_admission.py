@@ -0,0 +1,144 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import app.services.admission as admission
+from app.services.admission import AdmissionController, AdmissionMiddleware, TokenBucket
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(admission.time, "monotonic", clock)
+    return clock
+
+def test_bucket_admits_a_burst_then_asks_to_wait(clock):
+    bucket = TokenBucket(rate=2.0, burst=3)
+
+    assert [bucket.take("u1") for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert bucket.take("u1") == pytest.approx(0.5)
+    assert bucket.take("u2") == 0.0
+
+def test_bucket_refills_over_time(clock):
+    bucket = TokenBucket(rate=2.0, burst=3)
+    for _ in range(3):
+        bucket.take("u1")
+
+    clock.now += 0.5
+
+    assert bucket.take("u1") == 0.0
+    assert bucket.take("u1") > 0
+
+def test_bucket_prunes_refilled_keys(clock, monkeypatch):
+    monkeypatch.setattr(TokenBucket, "MAX_KEYS", 2)
+    bucket = TokenBucket(rate=1.0, burst=1)
+    bucket.take("a")
+    bucket.take("b")
+    clock.now += 10
+
+    bucket.take("c")
+
+    assert set(bucket._buckets) == {"c"}
+
+class Endpoint:
+    """ASGI app standing in for the API; records whether it was reached"""
+
+    def __init__(self):
+        self.calls = 0
+        self.seen = None
+
+    async def __call__(self, scope, receive, send):
+        self.calls += 1
+        body = b""
+        while True:
+            message = await receive()
+            body += message.get("body", b"")
+            if not message.get("more_body"):
+                break
+        self.seen = (self.controller.active, self.controller.inflight_bytes)
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": str(len(body)).encode()})
+
+@pytest.fixture
+def controller(monkeypatch):
+    monkeypatch.setattr(admission.settings, "UPLOAD_MAX_CONCURRENT", 2)
+    monkeypatch.setattr(admission.settings, "UPLOAD_MAX_INFLIGHT_BYTES", 1000)
+    return AdmissionController()
+
+@pytest.fixture
+def endpoint(controller):
+    endpoint = Endpoint()
+    endpoint.controller = controller
+    return endpoint
+
+@pytest.fixture
+def client(endpoint, controller):
+    return TestClient(AdmissionMiddleware(endpoint, controller))
+
+def test_upload_reserves_its_bytes_and_releases_them(client, endpoint, controller):
+    response = client.post("/media/upload/", content=b"x" * 600)
+
+    assert response.status_code == 200
+    assert endpoint.seen == (1, 600)
+    assert (controller.active, controller.inflight_bytes) == (0, 0)
+
+def test_oversized_upload_is_413(client, endpoint):
+    response = client.post("/media/upload/", content=b"x" * 1001)
+
+    assert response.status_code == 413
+    assert endpoint.calls == 0
+
+def test_upload_without_content_length_is_411(client, endpoint):
+    def body():
+        yield b"x" * 100
+
+    response = client.post("/media/upload/", content=body())
+
+    assert response.status_code == 411
+    assert endpoint.calls == 0
+
+def test_large_resumable_chunk_takes_a_slot_but_no_bytes(client, endpoint, controller):
+    response = client.patch(
+        "/media/uploads/abc",
+        content=b"x" * 5000,
+        headers={"Content-Type": "application/offset+octet-stream"}
+    )
+
+    assert response.status_code == 200
+    assert response.text == "5000"
+    assert endpoint.seen == (1, 0)
+
+def test_full_byte_budget_is_503_with_retry_after(client, controller):
+    controller.inflight_bytes = 900
+
+    response = client.post("/media/upload/", content=b"x" * 200)
+
+    assert response.status_code == 503
+    assert "Retry-After" in response.headers
+
+def test_concurrency_limit_applies_to_chunks(client, controller):
+    controller.active = controller.max_concurrent
+
+    response = client.patch("/media/uploads/abc", content=b"x")
+
+    assert response.status_code == 503
+
+def test_per_user_rate_limit_is_429(client, controller, monkeypatch):
+    monkeypatch.setattr(controller, "user_buckets", TokenBucket(rate=0.001, burst=1))
+
+    assert client.post("/media/upload/", content=b"x").status_code == 200
+    response = client.post("/media/upload/", content=b"x")
+
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+
+def test_other_routes_pass_through(client, endpoint, controller):
+    controller.active = controller.max_concurrent
+
+    assert client.get("/albums/").status_code == 200
+    assert endpoint.calls == 1
@@ -0,0 +1,21 @@
+import asyncio
+
+from mongomock_motor import AsyncCursor
+
+from app.database import find_many
+
+def test_find_many_limits_the_cursor(fake_db, monkeypatch):
+    asyncio.run(fake_db["albums"].insert_many([{"title": f"Album {i}"} for i in range(10)]))
+    limits = []
+    original = AsyncCursor.limit
+
+    def limit(cursor, n):
+        limits.append(n)
+        return original(cursor, n)
+
+    monkeypatch.setattr(AsyncCursor, "limit", limit)
+
+    albums = asyncio.run(find_many("albums", {}, {"title": 1}, sort=[("title", 1)], limit=3, skip=2))
+
+    assert [album["title"] for album in albums] == ["Album 2", "Album 3", "Album 4"]
+    assert limits == [3]
@@ -0,0 +1,44 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.services.changes import change_log
+
+@pytest.fixture
+def album_with_media(fake_db):
+    async def setup():
+        album = await fake_db["albums"].insert_one({"host_id": "h1", "title": "Reception", "is_public": True})
+        album_id = str(album.inserted_id)
+        await fake_db["media"].insert_one({
+            "album_id": album_id,
+            "url": "/media_storage/k1.jpg",
+            "status": "active",
+            "approved": True,
+            "flagged": False,
+            "uploaded_at": datetime.utcnow(),
+            **await change_log.next_seq(album_id)
+        })
+        return album_id
+    return asyncio.run(setup())
+
+def test_media_of_live_album_is_listed(client, album_with_media):
+    assert len(client.get(f"/media/album/{album_with_media}").json()) == 1
+    assert len(client.get("/media/all").json()) == 1
+
+def test_media_of_deleted_album_is_hidden_before_the_sweep(client, album_with_media):
+    assert client.delete(f"/albums/{album_with_media}").status_code == 200
+
+    assert client.get(f"/media/album/{album_with_media}").status_code == 404
+    assert client.get(f"/media/album/{album_with_media}/changes").status_code == 404
+    assert client.get("/media/all").json() == []
+
+def test_media_of_expired_album_is_hidden(client, fake_db, album_with_media):
+    from bson import ObjectId
+    asyncio.run(fake_db["albums"].update_one(
+        {"_id": ObjectId(album_with_media)},
+        {"$set": {"expires_at": datetime.utcnow() - timedelta(minutes=1)}}
+    ))
+
+    assert client.get(f"/media/album/{album_with_media}").status_code == 404
+    assert client.get("/media/all").json() == []
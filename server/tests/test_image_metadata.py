@@ -0,0 +1,56 @@
+import asyncio
+import io
+
+import pytest
+from bson import ObjectId
+from PIL import Image
+
+from app.services.imaging import DATETIME_ORIGINAL, EXIF_IFD, ORIENTATION
+from app.services.moderation import moderation_service
+
+def make_jpeg(captured_at: str, orientation: int = 1) -> bytes:
+    # Stored 4x2, so a rotated orientation displays as 2x4
+    image = Image.new("RGB", (4, 2), (200, 30, 30))
+    exif = image.getexif()
+    exif[ORIENTATION] = orientation
+    exif.get_ifd(EXIF_IFD)[DATETIME_ORIGINAL] = captured_at
+    buffer = io.BytesIO()
+    image.save(buffer, "JPEG", exif=exif)
+    return buffer.getvalue()
+
+@pytest.fixture(autouse=True)
+def no_nsfw_api(monkeypatch):
+    monkeypatch.setattr(moderation_service, "api_url", "")
+
+def upload(client, album_id, filename, contents):
+    response = client.post(
+        "/media/upload/",
+        files={"file": (filename, contents, "image/jpeg")},
+        data={"album_id": album_id}
+    )
+    assert response.status_code == 200
+    return response.json()["inserted_id"]
+
+def test_rotated_jpeg_metadata_is_stored(client, fake_db):
+    media_id = upload(client, "a1", "rotated.jpg", make_jpeg("2026:06:01 18:30:00", orientation=6))
+
+    media = asyncio.run(fake_db["media"].find_one({"_id": ObjectId(media_id)}))
+
+    assert (media["width"], media["height"]) == (2, 4)
+    assert media["orientation"] == 6
+    assert media["captured_at"].isoformat() == "2026-06-01T18:30:00"
+    assert media["dominant_color"].startswith("#")
+    assert len(media["blurhash"]) == 28  # 4x3 components
+
+def test_album_lists_by_capture_time(client):
+    # Uploaded out of order: the ceremony photo arrives after the reception one
+    upload(client, "a1", "reception.jpg", make_jpeg("2026:06:01 21:00:00"))
+    upload(client, "a1", "ceremony.jpg", make_jpeg("2026:06:01 15:00:00", orientation=6))
+
+    by_upload = client.get("/media/album/a1").json()
+    by_capture = client.get("/media/album/a1", params={"sort": "captured"}).json()
+
+    assert [m["filename"] for m in by_upload] == ["reception.jpg", "ceremony.jpg"]
+    assert [m["filename"] for m in by_capture] == ["ceremony.jpg", "reception.jpg"]
+    assert by_capture[0]["captured_at"] == "2026-06-01T15:00:00"
+    assert (by_capture[0]["width"], by_capture[0]["height"]) == (2, 4)
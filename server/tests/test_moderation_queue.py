@@ -0,0 +1,86 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from bson import ObjectId
+
+from app.services.moderation import moderation_service
+from app.services.moderation_queue import moderation_queue
+
+def insert_flagged(fake_db, **fields):
+    doc = {"album_id": "a1", "url": "/media_storage/k.jpg", "status": "flagged", **fields}
+    return asyncio.run(fake_db["media"].insert_one(doc)).inserted_id
+
+def claim(client, reviewer, limit=10):
+    response = client.post("/moderation/claim", params={"reviewer": reviewer, "limit": limit})
+    assert response.status_code == 200
+    return response.json()
+
+def test_unscored_media_is_not_starved(client, fake_db):
+    now = datetime.utcnow()
+    video = insert_flagged(fake_db, type="video", moderation_score=None, uploaded_at=now - timedelta(hours=1))
+    insert_flagged(fake_db, type="photo", moderation_score=0.2, uploaded_at=now - timedelta(hours=2))
+    insert_flagged(fake_db, type="photo", moderation_score=0.9, uploaded_at=now)
+
+    asyncio.run(moderation_queue.backfill_scores())
+    items = claim(client, "alice")
+
+    assert [item["moderation_score"] for item in items] == [0.9, moderation_queue.default_score, 0.2]
+    assert items[1]["_id"] == str(video)
+
+def test_report_gives_legacy_media_the_default_score(client, fake_db):
+    media_id = asyncio.run(fake_db["media"].insert_one({
+        "album_id": "a1", "url": "/media_storage/k.jpg", "status": "active", "change_seq": 1
+    })).inserted_id
+
+    assert client.post(f"/media/report/{media_id}").status_code == 200
+
+    media = asyncio.run(fake_db["media"].find_one({"_id": media_id}))
+    assert media["status"] == "flagged"
+    assert media["moderation_score"] == moderation_queue.default_score
+
+def test_assess_without_api_leaves_image_unscored(monkeypatch):
+    monkeypatch.setattr(moderation_service, "api_url", "")
+
+    assert asyncio.run(moderation_service.assess(b"jpeg")) == {"is_safe": True, "score": None}
+
+def test_claim_never_hands_out_the_same_item_twice(client, fake_db):
+    for score in (0.1, 0.5, 0.9):
+        insert_flagged(fake_db, moderation_score=score, uploaded_at=datetime.utcnow())
+
+    first = claim(client, "alice", 2)
+    second = claim(client, "bob", 2)
+
+    assert len(first) == 2 and len(second) == 1
+    assert not {item["_id"] for item in first} & {item["_id"] for item in second}
+
+@pytest.mark.parametrize("method, path", [
+    ("patch", "/media/approve/{}"),
+    ("delete", "/media/reject/{}"),
+    ("patch", "/admin/approve-media/{}"),
+    ("delete", "/admin/reject-media/{}"),
+])
+def test_deprecated_endpoints_leave_leased_items_alone(client, fake_db, method, path):
+    media_id = insert_flagged(fake_db, moderation_score=0.5, uploaded_at=datetime.utcnow())
+    claim(client, "alice")
+
+    response = getattr(client, method)(path.format(media_id))
+
+    assert response.status_code == 409
+    media = asyncio.run(fake_db["media"].find_one({"_id": media_id}))
+    assert media["status"] == "flagged"
+    assert media["lease_owner"] == "alice"
+
+def test_deprecated_approve_clears_a_lapsed_lease(client, fake_db):
+    media_id = insert_flagged(
+        fake_db, lease_owner="alice", lease_until=datetime.utcnow() - timedelta(minutes=1), change_seq=1
+    )
+
+    assert client.patch(f"/admin/approve-media/{media_id}").status_code == 200
+
+    media = asyncio.run(fake_db["media"].find_one({"_id": media_id}))
+    assert media["status"] == "active"
+    assert media["lease_owner"] is None and media["lease_until"] is None
+
+def test_deprecated_reject_of_missing_media_is_a_404(client):
+    assert client.delete(f"/media/reject/{ObjectId()}").status_code == 404
@@ -0,0 +1,64 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.services.storage import storage_service
+from app.services.sweeper import AlbumSweeper
+
+class FakeBucket:
+    """Supabase bucket stand-in with the same offset-paged listing"""
+
+    def __init__(self, names, created_at):
+        self.files = {name: created_at for name in names}
+
+    def list(self, path, options):
+        names = sorted(self.files)[options["offset"]:options["offset"] + options["limit"]]
+        return [
+            {"id": name, "name": name, "created_at": self.files[name].isoformat() + "Z"}
+            for name in names
+        ]
+
+    def remove(self, names):
+        for name in names:
+            self.files.pop(name, None)
+
+class FakeSupabase:
+    def __init__(self, bucket):
+        self.storage = self
+        self.bucket = bucket
+
+    def from_(self, name):
+        return self.bucket
+
+@pytest.fixture
+def sweeper(fake_db):
+    sweeper = AlbumSweeper()
+    sweeper.batch_size = 3
+    sweeper.batch_delay = 0
+    return sweeper
+
+def test_collects_every_orphan_across_offset_pages(sweeper, fake_db, monkeypatch):
+    old = datetime.utcnow() - timedelta(days=2)
+    names = [f"{i:02d}.jpg" for i in range(10)]
+    bucket = FakeBucket(names, old)
+    monkeypatch.setattr(storage_service, "storage_type", "supabase")
+    monkeypatch.setattr(storage_service, "supabase", FakeSupabase(bucket))
+
+    referenced = {"02.jpg", "07.jpg"}
+    asyncio.run(fake_db["media"].insert_many([
+        {"storage_key": name, "url": f"/media_storage/{name}"} for name in referenced
+    ]))
+
+    removed = asyncio.run(sweeper.collect_orphans())
+
+    assert removed == 8
+    assert set(bucket.files) == referenced
+
+def test_keeps_recent_files(sweeper, fake_db, monkeypatch):
+    bucket = FakeBucket(["new.jpg"], datetime.utcnow())
+    monkeypatch.setattr(storage_service, "storage_type", "supabase")
+    monkeypatch.setattr(storage_service, "supabase", FakeSupabase(bucket))
+
+    assert asyncio.run(sweeper.collect_orphans()) == 0
+    assert set(bucket.files) == {"new.jpg"}
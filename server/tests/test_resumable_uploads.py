@@ -0,0 +1,207 @@
+import asyncio
+import base64
+import os
+
+import pytest
+
+from app.services.uploads import upload_service
+
+CHUNK_HEADERS = {"Content-Type": "application/offset+octet-stream"}
+
+def encode_metadata(**values):
+    return ",".join(f"{key} {base64.b64encode(value.encode()).decode()}" for key, value in values.items())
+
+def create_upload(client, length, filename="clip.mp4", filetype="video/mp4"):
+    response = client.post("/media/uploads/", headers={
+        "Upload-Length": str(length),
+        "Upload-Metadata": encode_metadata(filename=filename, filetype=filetype, album_id="a1")
+    })
+    assert response.status_code == 201
+    return response.headers["Location"]
+
+def patch(client, location, offset, body):
+    return client.patch(location, content=body, headers={**CHUNK_HEADERS, "Upload-Offset": str(offset)})
+
+def send_interrupted_patch(app, location, offset, chunks):
+    """Drive the ASGI app directly: send ``chunks`` then drop the connection"""
+    messages = [{"type": "http.request", "body": chunk, "more_body": True} for chunk in chunks]
+    messages.append({"type": "http.disconnect"})
+    sent = []
+
+    async def receive():
+        if messages:
+            return messages.pop(0)
+        await asyncio.Event().wait()
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "PATCH",
+        "scheme": "http",
+        "path": location,
+        "raw_path": location.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [
+            (b"host", b"testserver"),
+            (b"content-type", CHUNK_HEADERS["Content-Type"].encode()),
+            (b"upload-offset", str(offset).encode()),
+            (b"content-length", b"1000000"),
+        ],
+        "client": ("testclient", 50000),
+        "server": ("testserver", 80),
+    }
+    asyncio.run(app(scope, receive, send))
+    return next(message["status"] for message in sent if message["type"] == "http.response.start")
+
+def test_create_returns_location_and_zero_offset(client):
+    response = client.post("/media/uploads/", headers={"Upload-Length": "10"})
+
+    assert response.status_code == 201
+    assert response.headers["Location"].startswith("/media/uploads/")
+    assert response.headers["Upload-Offset"] == "0"
+    assert response.headers["Tus-Resumable"] == "1.0.0"
+
+def test_create_rejects_oversized_upload(client):
+    response = client.post("/media/uploads/", headers={"Upload-Length": str(upload_service.max_size + 1)})
+
+    assert response.status_code == 413
+
+def test_partial_patch_advances_offset(client):
+    data = os.urandom(1000)
+    location = create_upload(client, len(data))
+
+    response = patch(client, location, 0, data[:400])
+
+    assert response.status_code == 204
+    assert response.headers["Upload-Offset"] == "400"
+
+def test_head_reports_offset_for_resume(client):
+    data = os.urandom(1000)
+    location = create_upload(client, len(data))
+    patch(client, location, 0, data[:250])
+
+    response = client.head(location)
+
+    assert response.status_code == 200
+    assert response.headers["Upload-Offset"] == "250"
+    assert response.headers["Upload-Length"] == "1000"
+    assert response.headers["Cache-Control"] == "no-store"
+
+def test_head_unknown_upload_is_404(client):
+    assert client.head("/media/uploads/missing").status_code == 404
+
+def test_offset_mismatch_is_409(client):
+    data = os.urandom(1000)
+    location = create_upload(client, len(data))
+    patch(client, location, 0, data[:400])
+
+    response = patch(client, location, 0, data[:400])
+
+    assert response.status_code == 409
+    assert response.headers["Upload-Offset"] == "400"
+    assert client.head(location).headers["Upload-Offset"] == "400"
+
+def test_overrun_past_upload_length_is_413(client):
+    location = create_upload(client, 100)
+
+    response = patch(client, location, 0, os.urandom(150))
+
+    assert response.status_code == 413
+    assert int(client.head(location).headers["Upload-Offset"]) <= 100
+
+def test_disconnect_keeps_received_bytes_and_resumes(app, client, fake_db):
+    data = os.urandom(3000)
+    location = create_upload(client, len(data))
+
+    status = send_interrupted_patch(app, location, 0, [data[:1000], data[1000:1500]])
+
+    assert status == 204
+    offset = int(client.head(location).headers["Upload-Offset"])
+    assert offset == 1500
+
+    # The interrupted request released its lock, so the client can resume at once
+    response = patch(client, location, offset, data[offset:])
+    assert response.status_code == 200
+
+    stored = os.listdir("media_storage")
+    assert len(stored) == 1
+    with open(os.path.join("media_storage", stored[0]), "rb") as f:
+        assert f.read() == data
+
+def test_final_chunk_stores_media_and_drops_session(client, fake_db):
+    data = os.urandom(1000)
+    location = create_upload(client, len(data))
+    patch(client, location, 0, data[:600])
+
+    response = patch(client, location, 600, data[600:])
+
+    assert response.status_code == 200
+    assert response.headers["Upload-Offset"] == "1000"
+    body = response.json()
+    media = asyncio.run(fake_db["media"].find_one({}))
+    assert str(media["_id"]) == body["inserted_id"]
+    assert media["filename"] == "clip.mp4"
+    assert media["type"] == "video"
+    assert media["album_id"] == "a1"
+    assert client.head(location).status_code == 404
+    assert os.listdir(upload_service.staging_dir) == []
+
+def test_concurrent_patch_is_locked_out(client):
+    data = os.urandom(1000)
+    location = create_upload(client, len(data))
+    upload_id = location.rsplit("/", 1)[-1]
+    token = asyncio.run(upload_service.acquire_lock(upload_id))
+    assert token is not None
+
+    response = patch(client, location, 0, data[:100])
+
+    assert response.status_code == 423
+    assert "Retry-After" in response.headers
+    assert client.head(location).headers["Upload-Offset"] == "0"
+
+    asyncio.run(upload_service.release_lock(upload_id, token))
+    assert patch(client, location, 0, data[:100]).status_code == 204
+
+def test_cancel_discards_upload(client):
+    location = create_upload(client, 100)
+    patch(client, location, 0, os.urandom(50))
+
+    assert client.delete(location).status_code == 204
+    assert client.head(location).status_code == 404
+    assert os.listdir(upload_service.staging_dir) == []
+
+def test_offset_is_stored_on_the_session(client, fake_db):
+    location = create_upload(client, 1000)
+    patch(client, location, 0, os.urandom(300))
+
+    session = asyncio.run(fake_db["uploads"].find_one({"_id": location.rsplit("/", 1)[-1]}))
+
+    assert session["offset"] == 300
+    assert session["lock_owner"] is None
+
+def test_missing_staged_file_is_410_not_offset_zero(client):
+    location = create_upload(client, 1000)
+    patch(client, location, 0, os.urandom(300))
+    os.remove(upload_service.staged_path(location.rsplit("/", 1)[-1]))
+
+    assert client.head(location).status_code == 410
+    assert patch(client, location, 0, os.urandom(100)).status_code == 410
+
+def test_unconfirmed_bytes_are_discarded_on_resume(client):
+    data = os.urandom(1000)
+    location = create_upload(client, len(data))
+    patch(client, location, 0, data[:300])
+    # A worker died after writing bytes it never confirmed
+    with open(upload_service.staged_path(location.rsplit("/", 1)[-1]), "ab") as f:
+        f.write(b"garbage")
+
+    assert client.head(location).headers["Upload-Offset"] == "300"
+    assert patch(client, location, 300, data[300:]).status_code == 200
+    stored = os.listdir("media_storage")
+    with open(os.path.join("media_storage", stored[0]), "rb") as f:
+        assert f.read() == data
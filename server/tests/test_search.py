@@ -0,0 +1,76 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+from bson import ObjectId
+
+from app.services.search import InvertedIndex, search_service
+
+@pytest.fixture
+def in_memory_search(fake_db, monkeypatch):
+    monkeypatch.setattr(search_service, "in_memory", True)
+    monkeypatch.setattr(search_service, "indexes", {"media": InvertedIndex(), "albums": InvertedIndex()})
+    monkeypatch.setattr(search_service, "_last_ids", {"media": None, "albums": None})
+    monkeypatch.setattr(search_service, "_last_refresh", 0.0)
+    return search_service
+
+def test_index_ranks_exact_over_prefix_and_newer_first():
+    index = InvertedIndex()
+    ids = [ObjectId() for _ in range(3)]
+    index.add(ids[0], {"caption": "first dance"})
+    index.add(ids[1], {"caption": "first dancers"})
+    index.add(ids[2], {"caption": "first dance again"})
+
+    assert index.search("first dance", 10) == [ids[2], ids[0], ids[1]]
+    assert index.search("first dan", 10) == [ids[2], ids[1], ids[0]]
+    assert index.search("cake", 10) == []
+
+def test_search_hides_internal_fields(client, fake_db, in_memory_search):
+    asyncio.run(fake_db["media"].insert_one({
+        "album_id": "a1",
+        "url": "/media_storage/k1.jpg",
+        "storage_key": "k1.jpg",
+        "caption": "cutting the cake",
+        "status": "active",
+        "approved": True,
+        "flagged": False,
+        "moderation_score": 0.1,
+        "lease_owner": "alice",
+        "lease_until": datetime.utcnow(),
+        "uploaded_at": datetime.utcnow()
+    }))
+    asyncio.run(fake_db["albums"].insert_one({
+        "host_id": "h1", "title": "Cake night", "is_public": True, "expires_at": None, "deleted": False
+    }))
+
+    response = client.get("/search/", params={"q": "cake"})
+
+    assert response.status_code == 200
+    media, = response.json()["media"]
+    album, = response.json()["albums"]
+    assert media["caption"] == "cutting the cake"
+    for field in ("storage_key", "moderation_score", "lease_owner", "lease_until"):
+        assert field not in media
+    assert album["title"] == "Cake night"
+    assert "deleted" not in album
+
+@pytest.mark.parametrize("album", [
+    {"is_public": False},
+    {"is_public": True, "deleted": True},
+    {"is_public": True, "expires_at": datetime(2020, 1, 1)},
+])
+def test_search_skips_media_of_hidden_albums(client, fake_db, in_memory_search, album):
+    album_id = asyncio.run(fake_db["albums"].insert_one({"host_id": "h1", "title": "Hidden", **album})).inserted_id
+    asyncio.run(fake_db["media"].insert_one({
+        "album_id": str(album_id),
+        "url": "/media_storage/k1.jpg",
+        "caption": "cutting the cake",
+        "status": "active",
+        "approved": True,
+        "flagged": False
+    }))
+
+    response = client.get("/search/", params={"q": "cake", "scope": "media"})
+
+    assert response.status_code == 200
+    assert response.json()["media"] == []
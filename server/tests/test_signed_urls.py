@@ -0,0 +1,89 @@
+import asyncio
+import os
+import time
+
+import pytest
+
+from app.config import settings
+from app.services.signing import UrlSigner, url_signer
+
+@pytest.fixture
+def signer(monkeypatch):
+    monkeypatch.setattr(url_signer, "enabled", True)
+    monkeypatch.setattr(url_signer, "base_url", "https://api.example.com")
+    return url_signer
+
+@pytest.fixture
+def stored_file(app):
+    os.makedirs("media_storage", exist_ok=True)
+    with open(os.path.join("media_storage", "k1.jpg"), "wb") as f:
+        f.write(b"jpeg")
+    return "k1.jpg"
+
+def sign(items):
+    return asyncio.run(url_signer.sign_media(items))
+
+def test_signing_is_off_without_cdn_base_url(monkeypatch):
+    monkeypatch.setattr(settings, "SIGNED_URLS_ENABLED", True)
+    monkeypatch.setattr(settings, "CDN_BASE_URL", "")
+
+    assert not UrlSigner().enabled
+
+def test_signed_urls_are_absolute(fake_db, signer):
+    item, = sign([{"album_id": "a1", "url": "/media_storage/k1.jpg", "status": "active"}])
+
+    assert item["url"].startswith("https://api.example.com/media/cdn/")
+    assert item["url"].endswith("/k1.jpg")
+
+def test_active_media_is_cached_publicly(client, fake_db, signer, stored_file):
+    item, = sign([{"album_id": "a1", "url": f"/media_storage/{stored_file}", "status": "active"}])
+
+    response = client.get(item["url"].replace(signer.base_url, ""))
+
+    assert response.status_code == 200
+    assert response.headers["Cache-Control"].startswith("public, max-age=")
+    assert "immutable" in response.headers["Cache-Control"]
+
+def test_flagged_media_is_never_cached(client, fake_db, signer, stored_file):
+    item, = sign([{"album_id": "a1", "url": f"/media_storage/{stored_file}", "status": "flagged"}])
+    path = item["url"].replace(signer.base_url, "")
+
+    assert path.startswith("/media/cdn/review/")
+    expires = int(path.split("/")[4])
+    assert expires <= time.time() + signer.review_ttl
+    response = client.get(path)
+
+    assert response.status_code == 200
+    assert response.headers["Cache-Control"] == "private, no-store"
+
+def test_review_signature_does_not_grant_public_url(client, fake_db, signer, stored_file):
+    item, = sign([{"album_id": "a1", "url": f"/media_storage/{stored_file}", "status": "flagged"}])
+    path = item["url"].replace(signer.base_url, "")
+
+    response = client.get(path.replace("/media/cdn/review/", "/media/cdn/"))
+
+    assert response.status_code == 403
+
+def test_public_urls_do_not_change_between_days(fake_db, signer):
+    today = signer.expiry(True, time.time())
+    next_week = signer.expiry(True, time.time() + 7 * 24 * 60 * 60)
+
+    assert today == next_week
+    assert signer.cache_control(today) == f"public, max-age={365 * 24 * 60 * 60}, immutable"
+
+def test_private_urls_are_bucketed(signer):
+    now = 1_700_000_000
+    expires = signer.expiry(False, now)
+
+    assert expires % signer.bucket_seconds == 0
+    assert now + signer.private_ttl <= expires < now + signer.private_ttl + signer.bucket_seconds
+
+def test_upload_response_carries_the_signed_url(client, signer):
+    response = client.post(
+        "/media/upload/",
+        files={"file": ("clip.mp4", b"video", "video/mp4")},
+        data={"album_id": "a1"}
+    )
+
+    assert response.status_code == 200
+    assert response.json()["url"].startswith("https://api.example.com/media/cdn/")
@@ -0,0 +1,34 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from app.routers import users
+
+@pytest.mark.parametrize("path", ["/users/", "/admin/users"])
+def test_lists_user_summaries(client, fake_db, path):
+    asyncio.run(fake_db["users"].insert_many([
+        {"name": f"Guest {i}", "email": f"guest{i}@example.com", "password": "hash", "created_at": datetime(2026, 1, 1)}
+        for i in range(3)
+    ]))
+
+    response = client.get(path)
+
+    assert response.status_code == 200
+    body = response.json()
+    assert len(body) == 3
+    assert set(body[0]) == {"id", "name", "email", "role", "created_at"}
+    assert body[0]["role"] == "guest"
+    assert body[0]["created_at"] == "2026-01-01T00:00:00"
+
+@pytest.mark.parametrize("path", ["/users/", "/admin/users"])
+def test_query_failure_is_a_500(client, fake_db, monkeypatch, path):
+    async def timed_out(*args, **kwargs):
+        raise RuntimeError("operation exceeded time limit")
+
+    monkeypatch.setattr(users, "find_many", timed_out)
+
+    response = client.get(path)
+
+    assert response.status_code == 500
+    assert "operation exceeded time limit" in response.json()["detail"]